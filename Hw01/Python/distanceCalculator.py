@@ -0,0 +1,306 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+Exact maze distances between every pair of open cells of a layout.
+
+  oracle = getDistanceOracle(gameState.data.layout)
+  oracle.distance((1,1), (5,3))        # the maze distance
+  oracle.nearest((1,1), food.asList()) # (distance, position) of the closest
+
+The distances are found once per layout, by a breadth first search from
+every open cell, and kept in one array of 16-bit ints.  When the layout was
+loaded from a file they are also saved in its compiled layout cache (see
+layout.py), so later runs only read them back.
+
+For layouts too large for all pairs, a LandmarkIndex keeps the distances
+from a few landmark cells only, which give lower bounds on every distance.
+A JunctionGraph contracts every corridor of a layout into a single edge,
+for searches that should not walk corridors one cell at a time, and a
+DistanceField keeps the distance from every cell to the nearest of a set of
+cells (such as the food left) as that set shrinks.
+"""
+
+import array, marshal, os
+
+# The distance between cells that cannot reach each other
+UNREACHABLE = 65535
+
+DISTANCES_VERSION = 1
+
+# Landmarks per LandmarkIndex, unless getLandmarkIndex is told otherwise
+NUM_LANDMARKS = 8
+
+_oracles = {}
+_landmarkIndexes = {}
+_junctionGraphs = {}
+
+def getDistanceOracle(layout):
+  "Returns the DistanceOracle of a layout, building it on first use."
+  key = layout.getLayoutHash()
+  if key not in _oracles:
+    _oracles[key] = DistanceOracle(layout)
+  return _oracles[key]
+
+def getLandmarkIndex(layout, numLandmarks=None):
+  "Returns the LandmarkIndex of a layout, building it on first use."
+  if numLandmarks == None: numLandmarks = NUM_LANDMARKS
+  key = (layout.getLayoutHash(), numLandmarks)
+  if key not in _landmarkIndexes:
+    _landmarkIndexes[key] = LandmarkIndex(layout, numLandmarks)
+  return _landmarkIndexes[key]
+
+def getJunctionGraph(layout):
+  "Returns the JunctionGraph of a layout, building it on first use."
+  key = layout.getLayoutHash()
+  if key not in _junctionGraphs:
+    _junctionGraphs[key] = JunctionGraph(layout)
+  return _junctionGraphs[key]
+
+def _cellGraph(layout):
+  """
+  Numbers the open cells of a layout in (x,y) order.  Returns the cells, a
+  dict from cell to number and, for every cell, the numbers of the cells one
+  move away.
+  """
+  cells = [(x, y) for x in range(layout.width) for y in range(layout.height)
+           if not layout.walls[x][y]]
+  cellIndex = dict([(cell, i) for i, cell in enumerate(cells)])
+  successors = [[cellIndex[next] for action, next in layout.moves[cell]] for cell in cells]
+  return cells, cellIndex, successors
+
+def _bfs(successors, source):
+  "Returns an array of the distances from cell source to every cell."
+  row = array.array('H', [UNREACHABLE]) * len(successors)
+  row[source] = 0
+  frontier = [source]
+  for cell in frontier: # frontier grows as we go, so this is a queue
+    distance = row[cell] + 1
+    for next in successors[cell]:
+      if row[next] == UNREACHABLE:
+        row[next] = distance
+        frontier.append(next)
+  return row
+
+class DistanceOracle:
+  """
+  Maze distances between all pairs of open cells of a layout.  Cells are
+  numbered in (x,y) order; the distance from cell i to cell j is
+  distances[i * numCells + j].
+  """
+  def __init__(self, layout):
+    self.cells, self.cellIndex, successors = _cellGraph(layout)
+    self.numCells = len(self.cells)
+
+    cacheName = None
+    if getattr(layout, 'cacheDir', None) != None:
+      cacheName = os.path.join(layout.cacheDir, '%s.distances%d' % (layout.getLayoutHash().encode('hex'), DISTANCES_VERSION))
+    self.distances = self._load(cacheName)
+    if self.distances == None:
+      self.distances = array.array('H')
+      for source in range(self.numCells):
+        self.distances.extend(_bfs(successors, source))
+      self._save(cacheName)
+
+  def _load(self, cacheName):
+    if cacheName == None: return None
+    try:
+      f = open(cacheName, 'rb')
+      try: numCells, data = marshal.load(f)
+      finally: f.close()
+    except (IOError, EOFError, ValueError, TypeError):
+      return None
+    if numCells != self.numCells: return None
+    return array.array('H', data)
+
+  def _save(self, cacheName):
+    if cacheName == None: return
+    try:
+      tempName = '%s.%d' % (cacheName, os.getpid())
+      f = open(tempName, 'wb')
+      try: marshal.dump((self.numCells, self.distances.tostring()), f)
+      finally: f.close()
+      os.rename(tempName, cacheName)
+    except (IOError, OSError):
+      pass # The cache is only an optimization
+
+  def distance(self, a, b):
+    """
+    Returns the maze distance between open cells a and b, or None if neither
+    can be reached from the other.
+    """
+    d = self.distances[self.cellIndex[a] * self.numCells + self.cellIndex[b]]
+    if d == UNREACHABLE: return None
+    return d
+
+  def nearest(self, a, targets):
+    """
+    Returns (distance, target) for the target closest to a in the maze, or
+    (None, None) if no target can be reached.
+    """
+    start = self.cellIndex[a] * self.numCells
+    distances, cellIndex = self.distances, self.cellIndex
+    best, bestTarget = UNREACHABLE, None
+    for target in targets:
+      d = distances[start + cellIndex[target]]
+      if d < best: best, bestTarget = d, target
+    if bestTarget == None: return None, None
+    return best, bestTarget
+
+class LandmarkIndex:
+  """
+  Maze distances from a few landmark cells to every open cell.  By the
+  triangle inequality, |d(L, a) - d(L, b)| <= d(a, b) for every landmark L,
+  so lowerBound(a, b) is an admissible and consistent estimate of the maze
+  distance (the ALT heuristic).
+
+  Landmarks are chosen farthest first: each is the cell farthest from all
+  the landmarks before it, which spreads them around the edges of the maze.
+  """
+  def __init__(self, layout, numLandmarks=8):
+    self.cells, self.cellIndex, successors = _cellGraph(layout)
+    self.landmarks = []
+    self.distances = [] # One array per landmark
+    if not self.cells: return
+    closest = _bfs(successors, 0) # Distance to the nearest landmark so far
+    for i in range(min(numLandmarks, len(self.cells))):
+      landmark = max(range(len(self.cells)), key=closest.__getitem__)
+      row = _bfs(successors, landmark)
+      self.landmarks.append(self.cells[landmark])
+      self.distances.append(row)
+      if i == 0: closest = row
+      else: closest = array.array('H', map(min, closest, row))
+
+  def lowerBound(self, a, b):
+    "Returns a lower bound on the maze distance between open cells a and b."
+    i, j = self.cellIndex[a], self.cellIndex[b]
+    bound = 0
+    for row in self.distances:
+      da, db = row[i], row[j]
+      if da == UNREACHABLE or db == UNREACHABLE: continue
+      if da - db > bound: bound = da - db
+      elif db - da > bound: bound = db - da
+    return bound
+
+class JunctionGraph:
+  """
+  The open cells of a layout with every corridor contracted.  A cell with
+  exactly two open neighbors is a corridor cell; every other cell (a
+  junction or a dead end) is a node, and so is one cell of each loop made
+  of corridor cells only.  edges[node] lists a corridor for each move out
+  of the node, as (end, actions, cells): the node the corridor leads to,
+  the actions that walk it and the cells they enter, end included.
+  """
+  def __init__(self, layout):
+    self.moves = layout.moves
+    cells = [(x, y) for x in range(layout.width) for y in range(layout.height)
+             if not layout.walls[x][y]]
+    self.nodes = set([cell for cell in cells if len(self.moves[cell]) != 2])
+    self.edges = {}
+    walked = set()
+    for cell in sorted(self.nodes) + cells:
+      if cell in self.edges: continue
+      if cell not in self.nodes:
+        if cell in walked: continue
+        self.nodes.add(cell) # The first cell of a loop of corridor cells
+      corridors = [self.walk(cell, action, next) for action, next in self.moves[cell]]
+      self.edges[cell] = corridors
+      for end, actions, cellsWalked in corridors:
+        walked.update(cellsWalked)
+
+  def walk(self, start, action, cell):
+    """
+    Returns the corridor (end, actions, cells) entered by taking action
+    from start to cell, followed up to the next node.
+    """
+    actions, cells = [action], [cell]
+    previous = start
+    while cell not in self.nodes:
+      for action, next in self.moves[cell]:
+        if next != previous: break
+      previous, cell = cell, next
+      actions.append(action)
+      cells.append(cell)
+    return cell, tuple(actions), tuple(cells)
+
+class DistanceField:
+  """
+  The maze distance from every open cell of a layout to the nearest of a
+  set of source cells, found by one breadth first search from all the
+  sources at once.  Each cell also remembers which source it is nearest,
+  so removing a source only searches again from the cells that were
+  nearest to it, starting from the cells around them.
+  """
+  def __init__(self, layout, sources):
+    self.cells, self.cellIndex, self.successors = _cellGraph(layout)
+    self.distances = array.array('H', [UNREACHABLE]) * len(self.cells)
+    self.nearest = array.array('i', [-1]) * len(self.cells) # The source of each cell
+    self.sources = set([self.cellIndex[source] for source in sources])
+    for source in self.sources:
+      self.distances[source] = 0
+      self.nearest[source] = source
+    self._spread(sorted(self.sources))
+
+  def numSources(self):
+    return len(self.sources)
+
+  def distance(self, cell):
+    "Returns the maze distance from cell to the nearest source, or None."
+    d = self.distances[self.cellIndex[cell]]
+    if d == UNREACHABLE: return None
+    return d
+
+  def nearestSource(self, cell):
+    "Returns the source nearest to cell, or None if no source can be reached."
+    source = self.nearest[self.cellIndex[cell]]
+    if source == -1: return None
+    return self.cells[source]
+
+  def removeSource(self, cell):
+    """
+    Stops counting cell as a source.  The cells that were nearest to it (a
+    connected region around it) are reset, then reached again from the
+    cells bordering that region.
+    """
+    source = self.cellIndex[cell]
+    self.sources.remove(source)
+    distances, nearest, successors = self.distances, self.nearest, self.successors
+    region = [source]
+    nearest[source] = -1
+    for cell in region: # region grows as we go
+      for next in successors[cell]:
+        if nearest[next] == source:
+          nearest[next] = -1
+          region.append(next)
+    border = set()
+    for cell in region:
+      distances[cell] = UNREACHABLE
+      for next in successors[cell]:
+        if nearest[next] != -1: border.add(next)
+    self._spread(border)
+
+  def _spread(self, seeds):
+    """
+    Lowers the distances of the cells around the seeds, whose distances
+    are already right, in order of distance.
+    """
+    distances, nearest, successors = self.distances, self.nearest, self.successors
+    buckets = {} # The cells reached at each distance
+    for cell in seeds:
+      buckets.setdefault(distances[cell], []).append(cell)
+    if not buckets: return
+    d = min(buckets)
+    while buckets:
+      for cell in buckets.pop(d, []):
+        if distances[cell] != d: continue
+        for next in successors[cell]:
+          if distances[next] > d + 1:
+            distances[next] = d + 1
+            nearest[next] = nearest[cell]
+            buckets.setdefault(d + 1, []).append(next)
+      d += 1
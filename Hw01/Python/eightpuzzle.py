@@ -190,7 +190,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
     self.puzzle = puzzle
 
   def getStartState(self):
-    return puzzle
+    return self.puzzle
       
   def isGoalState(self,state):
     return state.isGoal()
@@ -173,10 +173,23 @@ class Grid:
 
   def __eq__(self, other):
     if other == None: return False
-    return self.data == other.data
+    if isinstance(other, BitGrid): return other == self
+    if type(self.data) == type(other.data): return self.data == other.data
+    # A frozen grid holds tuples: compare it with a list grid column by column
+    if len(self.data) != len(other.data): return False
+    for a, b in zip(self.data, other.data):
+      if list(a) != list(b): return False
+    return True
+
+  def __ne__(self, other):
+    return not self == other
 
   def __hash__(self):
-    # return hash(str(self))
+    # The same hash as a BitGrid with the same cells, since they compare equal
+    return hash(self._cellBits())
+
+  def _cellBits(self):
+    "Returns the cells as one int, with cell (x,y) at bit x * height + y."
     base = 1
     h = 0
     for l in self.data:
@@ -184,11 +197,11 @@ class Grid:
         if i:
           h += base
         base *= 2
-    return hash(h)
+    return h
 
   def copy(self):
     g = Grid(self.width, self.height)
-    g.data = [x[:] for x in self.data]
+    g.data = [list(x) for x in self.data]
     return g
 
   def deepCopy(self):
@@ -199,6 +212,13 @@ class Grid:
     g.data = self.data
     return g
 
+  def freeze(self):
+    """
+    Makes the grid read-only, so that it can be shared with agents: any
+    grid[x][y] = value raises a TypeError.  Copies are writable again.
+    """
+    self.data = tuple([tuple(x) for x in self.data])
+
   def count(self, item =True ):
     return sum([x.count(item) for x in self.data])
 
@@ -257,6 +277,150 @@ class Grid:
         bools.append(False)
     return bools
 
+class BitGrid(Grid):
+  """
+  A boolean Grid backed by a single Python int, one bit per cell.  Cell (x,y)
+  is bit x * height + y, the same cell order packBits uses.
+
+  Data is accessed via grid[x][y] exactly as with a Grid.  Because the int is
+  immutable, copy() just shares it, and hashing, equality and count() work on
+  the int directly instead of looping over every cell.  This makes BitGrid the
+  right choice for grids that are copied and hashed on every successor, such
+  as the food grid.
+
+  The number of set cells and their positions are cached once computed.  The
+  cache is shared with copies and kept up to date as single cells change, so
+  count() is O(1) and asList() is O(number of set cells).
+  """
+  _frozen = False
+
+  def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+    if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+    self.CELLS_PER_INT = 30
+
+    self.width = width
+    self.height = height
+    self.bits = 0
+    if initialValue:
+      self.bits = (1 << (width * height)) - 1
+    self._count = None
+    self._positions = None
+    if bitRepresentation:
+      self._unpackBits(bitRepresentation)
+
+  def __getitem__(self, i):
+    if i < 0: i += self.width
+    if i < 0 or i >= self.width: raise IndexError('BitGrid column out of range')
+    return _BitColumn(self, i * self.height)
+
+  def __setitem__(self, key, item):
+    column = self[key]
+    for y in range(self.height):
+      column[y] = item[y]
+
+  def __str__(self):
+    out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+    out.reverse()
+    return '\n'.join([''.join(x) for x in out])
+
+  def __eq__(self, other):
+    if other == None: return False
+    if not isinstance(other, BitGrid):
+      return self.width == other.width and self.height == other.height and \
+             self.asList() == other.asList()
+    return self.bits == other.bits and self.width == other.width and self.height == other.height
+
+  def __ne__(self, other):
+    return not self == other
+
+  def _cellBits(self):
+    return self.bits
+
+  def copy(self):
+    g = BitGrid(self.width, self.height)
+    g.bits = self.bits
+    g._count = self._count
+    g._positions = self._positions
+    return g
+
+  def deepCopy(self):
+    return self.copy()
+
+  def shallowCopy(self):
+    # Copying is O(1), so there is no reason to alias the bits
+    return self.copy()
+
+  def freeze(self):
+    "Makes the grid read-only, as Grid.freeze does.  Copies are writable."
+    self._frozen = True
+
+  def setBits(self, bits):
+    "Replaces the contents of the grid with the given bits (see __init__)."
+    if self._frozen: raise TypeError('BitGrid is read-only')
+    self.bits = bits
+    self._count = None
+    self._positions = None
+
+  def count(self, item =True ):
+    if self._count == None:
+      self._count = bin(self.bits).count('1')
+    if item: return self._count
+    return self.width * self.height - self._count
+
+  def asList(self, key = True):
+    if key and self._positions != None:
+      return list(self._positions)
+    bits = self.bits
+    if not key:
+      bits = ~bits & ((1 << (self.width * self.height)) - 1)
+    positions = []
+    while bits:
+      low = bits & -bits
+      positions.append(divmod(low.bit_length() - 1, self.height))
+      bits ^= low
+    if key:
+      self._positions = tuple(positions)
+      self._count = len(positions)
+    return positions
+
+  def _setBit(self, index, value):
+    "Sets one bit, keeping the cached count and positions current."
+    if self._frozen: raise TypeError('BitGrid is read-only')
+    mask = 1 << index
+    if (self.bits & mask != 0) == bool(value): return
+    if value:
+      self.bits |= mask
+      if self._count != None: self._count += 1
+      self._positions = None
+    else:
+      self.bits &= ~mask
+      if self._count != None: self._count -= 1
+      if self._positions != None:
+        position = divmod(index, self.height)
+        self._positions = tuple([p for p in self._positions if p != position])
+
+class _BitColumn:
+  """
+  The column view returned by BitGrid.__getitem__, so that grid[x][y] reads
+  and writes the bit for cell (x,y).
+  """
+  def __init__(self, grid, offset):
+    self.grid = grid
+    self.offset = offset
+
+  def __getitem__(self, y):
+    if y < 0: y += self.grid.height
+    if y < 0 or y >= self.grid.height: raise IndexError('BitGrid row out of range')
+    return (self.grid.bits >> (self.offset + y)) & 1 == 1
+
+  def __setitem__(self, y, value):
+    if y < 0: y += self.grid.height
+    if y < 0 or y >= self.grid.height: raise IndexError('BitGrid row out of range')
+    self.grid._setBit(self.offset + y, value)
+
+  def __len__(self):
+    return self.grid.height
+
 def reconstituteGrid(bitRep):
   if type(bitRep) is not type((1,2)):
     return bitRep
@@ -351,21 +515,53 @@ class Actions:
     return (x + dx, y + dy)
   getSuccessor = staticmethod(getSuccessor)
 
+_ZOBRIST_MASK = (1 << 64) - 1
+_zobristKeys = {}
+
+def zobristKey(feature):
+  """
+  Returns the 64-bit Zobrist key of a hashable state feature, such as
+  ('food', (x, y)).  A state's key is the XOR of the keys of its features, so
+  it can be updated in O(1) as single features change.
+
+  Keys are derived from the feature itself rather than drawn from the random
+  module, so they are the same in every run and never disturb game randomness.
+  """
+  key = _zobristKeys.get(feature)
+  if key is None:
+    key = _mix64(hash(feature))
+    _zobristKeys[feature] = key
+  return key
+
+def _mix64(x):
+  "Spreads the bits of x over a 64-bit key (the splitmix64 finalizer)."
+  x = (x + 0x9E3779B97F4A7C15) & _ZOBRIST_MASK
+  x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _ZOBRIST_MASK
+  x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _ZOBRIST_MASK
+  return x ^ (x >> 31)
+
 class GameStateData:
   """
 
   """
   def __init__( self, prevState = None ):
     """
-    Generates a new data packet by copying information from its predecessor.
+    Generates a new data packet from its predecessor.
+
+    The food, capsules and agent states are shared with the predecessor
+    rather than copied.  Code that changes a state must copy what it changes
+    first: use getMutableAgentState for agent states, and replace (rather
+    than modify) the food grid and capsule list.
     """
     if prevState != None:
-      self.food = prevState.food.shallowCopy()
-      self.capsules = prevState.capsules[:]
-      self.agentStates = self.copyAgentStates( prevState.agentStates )
+      self.food = prevState.food
+      self.capsules = prevState.capsules
+      self.agentStates = prevState.agentStates
+      self._ownedAgents = None
       self.layout = prevState.layout
       self._eaten = prevState._eaten
       self.score = prevState.score
+      self._zobrist = prevState._zobrist
     self._foodEaten = None
     self._capsuleEaten = None
     self._agentMoved = None
@@ -376,18 +572,55 @@ class GameStateData:
   def deepCopy( self ):
     state = GameStateData( self )
     state.food = self.food.deepCopy()
+    state.capsules = self.capsules[:]
+    state.agentStates = self.copyAgentStates( self.agentStates )
+    state._ownedAgents = set( range( len( state.agentStates ) ) )
     state.layout = self.layout.deepCopy()
     state._agentMoved = self._agentMoved
     state._foodEaten = self._foodEaten
     state._capsuleEaten = self._capsuleEaten
     return state
 
+  def snapshot( self ):
+    """
+    Returns a copy of the state to hand to an agent as an observation.
+
+    Unlike deepCopy, the layout is shared rather than copied (its grids are
+    read-only) and the food grid copy is O(1), so only the agent states and
+    the capsule list are actually copied.  Nothing an agent does to the
+    snapshot can change this state.
+    """
+    state = GameStateData( self )
+    state.food = self.food.copy()
+    state.capsules = self.capsules[:]
+    state.agentStates = self.copyAgentStates( self.agentStates )
+    state._ownedAgents = set( range( len( state.agentStates ) ) )
+    state._eaten = self._eaten[:]
+    state._agentMoved = self._agentMoved
+    state._foodEaten = self._foodEaten
+    state._capsuleEaten = self._capsuleEaten
+    return state
+
   def copyAgentStates( self, agentStates ):
     copiedStates = []
     for agentState in agentStates:
       copiedStates.append( agentState.copy() )
     return copiedStates
 
+  def getMutableAgentState( self, agentIndex ):
+    """
+    Returns agentStates[agentIndex], first copying it (and the agentStates
+    list) if it is still shared with the predecessor state.  Always fetch an
+    agent state through here before changing it.
+    """
+    if self._ownedAgents == None:
+      self.agentStates = self.agentStates[:]
+      self._ownedAgents = set()
+    if agentIndex not in self._ownedAgents:
+      self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+      self._ownedAgents.add( agentIndex )
+    return self.agentStates[agentIndex]
+
   def __eq__( self, other ):
     """
     Allows two states to be compared.
@@ -404,13 +637,48 @@ class GameStateData:
     """
     Allows states to be keys of dictionaries.
     """
-    for i, state in enumerate( self.agentStates ):
-      try:
-        int(hash(state))
-      except TypeError, e:
-        print e
-        #hash(state)
-    return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+    return hash( self.getZobristKey() )
+
+  def getZobristKey( self ):
+    """
+    Returns the full 64-bit Zobrist key of the state.  Equal states always have
+    equal keys, and distinct states collide with probability about 2**-64.
+    """
+    return self._zobrist ^ _mix64( int( self.score ) )
+
+  def agentZobrist( self, agentIndex ):
+    """
+    Returns the Zobrist key of one agent's configuration and scared timer.
+    """
+    agentState = self.agentStates[agentIndex]
+    conf = agentState.configuration
+    if conf == None:
+      key = zobristKey( ('agent', agentIndex, None, None) )
+    else:
+      key = zobristKey( ('agent', agentIndex, conf.pos, conf.direction) )
+    return key ^ zobristKey( ('scared', agentIndex, agentState.scaredTimer) )
+
+  def rehashAgent( self, agentIndex, oldKey ):
+    """
+    Updates the state key after agent agentIndex changed; oldKey is the
+    agentZobrist value from before the change.
+    """
+    self._zobrist ^= oldKey ^ self.agentZobrist( agentIndex )
+
+  def computeZobrist( self ):
+    """
+    Computes the Zobrist key of the agents, food and capsules from scratch.
+    The rules keep it up to date incrementally, so this is only needed for a
+    freshly initialized state.
+    """
+    key = 0
+    for index in range( len( self.agentStates ) ):
+      key ^= self.agentZobrist( index )
+    for position in self.food.asList():
+      key ^= zobristKey( ('food', position) )
+    for position in self.capsules:
+      key ^= zobristKey( ('capsule', position) )
+    return key
 
   def __str__( self ):
     width, height = self.layout.width, self.layout.height
@@ -481,7 +749,9 @@ class GameStateData:
         if numGhosts == numGhostAgents: continue # Max ghosts reached already
         else: numGhosts += 1
       self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
+    self._ownedAgents = set( range( len( self.agentStates ) ) )
     self._eaten = [False for a in self.agentStates]
+    self._zobrist = self.computeZobrist()
 
 try:
   import boinc
@@ -506,6 +776,9 @@ class Game:
     self.moveHistory = []
     self.totalAgentTimes = [0 for agent in agents]
     self.totalAgentTimeWarnings = [0 for agent in agents]
+    self.agentMoveCounts = [0 for agent in agents]
+    self.totalAgentMoveTimes = [0 for agent in agents]
+    self.maxAgentMoveTimes = [0 for agent in agents]
     self.agentTimeout = False
     import cStringIO
     self.agentOutput = [cStringIO.StringIO() for agent in agents]
@@ -516,6 +789,11 @@ class Game:
     else:
       return self.rules.getProgress(self)
 
+  def recordMoveTime( self, agentIndex, moveTime ):
+    self.agentMoveCounts[agentIndex] += 1
+    self.totalAgentMoveTimes[agentIndex] += moveTime
+    self.maxAgentMoveTimes[agentIndex] = max(self.maxAgentMoveTimes[agentIndex], moveTime)
+
   def _agentCrash( self, agentIndex, quiet=False):
     "Helper method for handling agent crashes"
     if not quiet: traceback.print_exc()
@@ -546,7 +824,18 @@ class Game:
   def run( self ):
     """
     Main control loop for game play.
+
+    With catchExceptions, one Watchdog enforces the time limits for the
+    whole game, and the time taken by every move is recorded per agent.
     """
+    self.watchdog = Watchdog()
+    if self.catchExceptions: self.watchdog.start()
+    try:
+      self._run()
+    finally:
+      self.watchdog.stop()
+
+  def _run( self ):
     self.display.initialize(self.state.data)
     self.numMoves = 0
 
@@ -566,10 +855,9 @@ class Game:
         self.mute(i)
         if self.catchExceptions:
           try:
-            timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
             try:
               start_time = time.time()
-              timed_func(self.state.deepCopy())
+              self.watchdog.call(self.rules.getMaxStartupTime(i), agent.registerInitialState, self.state.snapshot())
               time_taken = time.time() - start_time
               self.totalAgentTimes[i] += time_taken
             except TimeoutFunctionException:
@@ -583,7 +871,7 @@ class Game:
             self.unmute()
             return
         else:
-          agent.registerInitialState(self.state.deepCopy())
+          agent.registerInitialState(self.state.snapshot())
         ## TODO: could this exceed the total time
         self.unmute()
 
@@ -600,10 +888,9 @@ class Game:
         self.mute(agentIndex)
         if self.catchExceptions:
           try:
-            timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
             try:
               start_time = time.time()
-              observation = timed_func(self.state.deepCopy())
+              observation = self.watchdog.call(self.rules.getMoveTimeout(agentIndex), agent.observationFunction, self.state.snapshot())
             except TimeoutFunctionException:
               skip_action = True
             move_time += time.time() - start_time
@@ -613,22 +900,21 @@ class Game:
             self.unmute()
             return
         else:
-          observation = agent.observationFunction(self.state.deepCopy())
+          observation = agent.observationFunction(self.state.snapshot())
         self.unmute()
       else:
-        observation = self.state.deepCopy()
+        observation = self.state.snapshot()
 
       # Solicit an action
       action = None
       self.mute(agentIndex)
       if self.catchExceptions:
         try:
-          timed_func = TimeoutFunction(agent.getAction, int(self.rules.getMoveTimeout(agentIndex)) - int(move_time))
           try:
             start_time = time.time()
             if skip_action:
               raise TimeoutFunctionException()
-            action = timed_func( observation )
+            action = self.watchdog.call(self.rules.getMoveTimeout(agentIndex) - move_time, agent.getAction, observation)
           except TimeoutFunctionException:
             print "Agent %d timed out on a single move!" % agentIndex
             self.agentTimeout = True
@@ -637,6 +923,7 @@ class Game:
             return
 
           move_time += time.time() - start_time
+          self.recordMoveTime(agentIndex, move_time)
 
           if move_time > self.rules.getMoveWarningTime(agentIndex):
             self.totalAgentTimeWarnings[agentIndex] += 1
@@ -8,51 +8,168 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import BitGrid
 import os
 import random
+import marshal, hashlib, array, copy
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# Compiled layouts are cached in this directory next to the .lay files.
+# Bump the version whenever the compiled form changes.
+COMPILED_LAYOUT_DIR = '.compiled'
+COMPILED_LAYOUT_VERSION = 3
+
+# The unit steps isVisibleFrom looks along, by direction
+VISIBILITY_DIRECTIONS = {'North': (0, 1), 'South': (0, -1), 'East': (1, 0), 'West': (-1, 0)}
+
 class Layout:
   """
   A Layout manages the static information about the game board.
   """
   
-  def __init__(self, layoutText):
+  def __init__(self, layoutText, compiled=None):
     self.width = len(layoutText[0])
     self.height= len(layoutText)
+    self.visibility = None # Computed when isVisibleFrom is first called
+    self.cacheDir = None # Where tryToLoad caches compiled data, if anywhere
+    self._visibilityData = None
+    if compiled != None:
+      self.layoutText = layoutText
+      self.loadCompiled(compiled)
+      return
     self.walls = Grid(self.width, self.height, False)
-    self.food = Grid(self.width, self.height, False)
+    self.food = BitGrid(self.width, self.height, False)
     self.capsules = []
     self.agentPositions = []
     self.numGhosts = 0
     self.processLayoutText(layoutText)
     self.layoutText = layoutText
-    # self.initializeVisibilityMatrix()
+    self.initializeActionTables()
+    # Game states share the layout with every agent, so keep it read-only
+    self.walls.freeze()
+    self.food.freeze()
     
   def getNumGhosts(self):
     return self.numGhosts
+
+  def compile(self):
+    """
+    Returns the parsed layout and its move tables as plain data that marshal
+    can store.  Layout(layoutText, compiled) rebuilds the layout from it
+    without parsing.
+    """
+    return {'walls': self.walls.data, 'food': self.food.bits,
+            'capsules': self.capsules, 'agentPositions': self.agentPositions,
+            'numGhosts': self.numGhosts, 'pacmanActions': self.pacmanActions,
+            'ghostActions': self.ghostActions, 'moves': self.moves,
+            'visibility': self.packVisibilityMatrix()}
+
+  def loadCompiled(self, compiled):
+    self.walls = Grid(self.width, self.height, False)
+    self.walls.data = compiled['walls']
+    self.walls.freeze()
+    self.food = BitGrid(self.width, self.height, False)
+    self.food.setBits(compiled['food'])
+    self.food.freeze()
+    self.capsules = compiled['capsules']
+    self.agentPositions = compiled['agentPositions']
+    self.numGhosts = compiled['numGhosts']
+    self.pacmanActions = compiled['pacmanActions']
+    self.ghostActions = compiled['ghostActions']
+    self.moves = compiled['moves']
+    self._visibilityData = compiled['visibility']
+
+  def getLayoutHash(self):
+    """
+    Returns the SHA-1 digest of the layout text, which identifies the layout
+    in game recordings and distance caches.
+    """
+    if getattr(self, '_layoutHash', None) == None:
+      self._layoutHash = hashlib.sha1('\n'.join(self.layoutText)).digest()
+    return self._layoutHash
+
+  def initializeActionTables(self):
+    """
+    Precomputes the movement tables for every open cell (x,y), so the rules
+    and search problems can look moves up instead of re-checking walls:
+
+      pacmanActions[(x,y)]            legal Pacman actions, STOP included
+      ghostActions[((x,y), direction)] legal actions for a ghost travelling in
+                                      direction (no STOP, no reversing unless
+                                      it is a dead end)
+      moves[(x,y)]                    (action, nextCell) pairs in the order
+                                      North, South, East, West
+
+    Actions are listed in the same order as Actions returns them, so the
+    tables are drop-in replacements.
+    """
+    from game import Actions, Directions
+    self.pacmanActions = {}
+    self.ghostActions = {}
+    self.moves = {}
+    for x in range(self.width):
+      for y in range(self.height):
+        if self.walls[x][y]: continue
+        possible = []
+        for direction, vec in Actions._directionsAsList:
+          dx, dy = vec
+          if not self.isWallOrOutside(x + dx, y + dy):
+            possible.append(direction)
+        pos = (x, y)
+        self.pacmanActions[pos] = tuple(possible)
+        for direction in Directions.REVERSE:
+          legal = [d for d in possible if d != Directions.STOP]
+          reverse = Actions.reverseDirection(direction)
+          if reverse in legal and len(legal) > 1:
+            legal.remove(reverse)
+          self.ghostActions[(pos, direction)] = tuple(legal)
+        moves = []
+        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+          if direction in possible:
+            dx, dy = Actions._directions[direction]
+            moves.append((direction, (x + dx, y + dy)))
+        self.moves[pos] = tuple(moves)
+
+  def isWallOrOutside(self, x, y):
+    if x < 0 or y < 0 or x >= self.width or y >= self.height: return True
+    return self.walls[x][y]
     
   def initializeVisibilityMatrix(self):
+    """
+    Sets visibility[direction][x * height + y] to the number of open cells
+    in a straight line from (x,y) in direction before the next wall.  Facing
+    that way, Pacman sees every position along that run, up to the wall.
+
+    Each direction takes a single sweep over the grid, taking the cells ahead
+    first.  The matrix comes from the compiled layout cache when there is
+    one, and is shared by all layouts with the same text.
+    """
     global VISIBILITY_MATRIX_CACHE
-    if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
-      from game import Directions
-      vecs = [(-0.5,0), (0.5,0),(0,-0.5),(0,0.5)]
-      dirs = [Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.EAST]
-      vis = Grid(self.width, self.height, {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()})
-      for x in range(self.width):
-        for y in range(self.height):
-          if self.walls[x][y] == False:
-            for vec, direction in zip(vecs, dirs):
-              dx, dy = vec
-              nextx, nexty = x + dx, y + dy
-              while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)] :
-                vis[x][y][direction].add((nextx, nexty))
-                nextx, nexty = x + dx, y + dy
-      self.visibility = vis      
-      VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-    else:
-      self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+    key = self.getLayoutHash()
+    if key not in VISIBILITY_MATRIX_CACHE:
+      vis = {}
+      if self._visibilityData != None:
+        for direction, data in self._visibilityData.items():
+          vis[direction] = array.array('H', data)
+      else:
+        for direction, (dx, dy) in VISIBILITY_DIRECTIONS.items():
+          reach = array.array('H', [0]) * (self.width * self.height)
+          xs, ys = range(self.width), range(self.height)
+          if dx > 0: xs.reverse()
+          if dy > 0: ys.reverse()
+          for x in xs:
+            for y in ys:
+              if self.isWallOrOutside(x + dx, y + dy): continue
+              reach[x * self.height + y] = reach[(x + dx) * self.height + y + dy] + 1
+          vis[direction] = reach
+      VISIBILITY_MATRIX_CACHE[key] = vis
+    self.visibility = VISIBILITY_MATRIX_CACHE[key]
+
+  def packVisibilityMatrix(self):
+    "Returns the visibility matrix as strings, for the compiled layout cache."
+    if self.visibility == None: self.initializeVisibilityMatrix()
+    return dict([(direction, reach.tostring()) for direction, reach in self.visibility.items()])
       
   def isWall(self, pos):
     x, col = pos
@@ -76,14 +193,26 @@ class Layout:
     return pos
   
   def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
+    if self.visibility == None: self.initializeVisibilityMatrix()
+    if pacDirection not in self.visibility: return False
     row, col = [int(x) for x in pacPos]
-    return ghostPos in self.visibility[row][col][pacDirection]
+    dx, dy = VISIBILITY_DIRECTIONS[pacDirection]
+    # How far ahead of Pacman, and how far to the side, the ghost is
+    if dx == 0: ahead, aside = (ghostPos[1] - col) * dy, ghostPos[0] - row
+    else: ahead, aside = (ghostPos[0] - row) * dx, ghostPos[1] - col
+    if aside != 0 or ahead <= 0 or 2 * ahead != int(2 * ahead): return False
+    return ahead <= self.visibility[pacDirection][row * self.height + col] + 0.5
   
   def __str__(self):
     return "\n".join(self.layoutText)
     
   def deepCopy(self):
-    return Layout(self.layoutText[:])
+    # The grids and tables are read-only, so the copy can share them
+    layout = copy.copy(self)
+    layout.layoutText = self.layoutText[:]
+    layout.capsules = self.capsules[:]
+    layout.agentPositions = self.agentPositions[:]
+    return layout
     
   def processLayoutText(self, layoutText):
     """
@@ -138,5 +267,32 @@ def getLayout(name, back = 2):
 def tryToLoad(fullname):
   if(not os.path.exists(fullname)): return None
   f = open(fullname)
-  try: return Layout([line.strip() for line in f])
-  finally: f.close()
\ No newline at end of file
+  try: text = f.read()
+  finally: f.close()
+  layoutText = [line.strip() for line in text.splitlines()]
+
+  # Layouts are compiled once and then loaded from a cache keyed by their text
+  key = hashlib.sha1('%d\n%s' % (COMPILED_LAYOUT_VERSION, text)).hexdigest()
+  cacheDir = os.path.join(os.path.dirname(fullname), COMPILED_LAYOUT_DIR)
+  cacheName = os.path.join(cacheDir, key)
+  try:
+    f = open(cacheName, 'rb')
+    try: layout = Layout(layoutText, marshal.load(f))
+    finally: f.close()
+    layout.cacheDir = cacheDir
+    return layout
+  except (IOError, EOFError, ValueError, TypeError, KeyError):
+    pass
+  layout = Layout(layoutText)
+  try:
+    if not os.path.isdir(cacheDir): os.mkdir(cacheDir)
+    layout.cacheDir = cacheDir
+    # Write to a private file first, so readers never see a partial one
+    tempName = '%s.%d' % (cacheName, os.getpid())
+    f = open(tempName, 'wb')
+    try: marshal.dump(layout.compile(), f)
+    finally: f.close()
+    os.rename(tempName, cacheName)
+  except (IOError, OSError):
+    pass # The cache is only an optimization
+  return layout
\ No newline at end of file
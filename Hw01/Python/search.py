@@ -12,8 +12,9 @@ by Pacman agents (in searchAgents.py).
 """
 
 import util
-from game import Directions
-#we have to import Directions from game.py
+import distanceCalculator
+import collections
+from game import Actions
 
 class SearchProblem:
   """
@@ -21,6 +22,10 @@ class SearchProblem:
   any of the methods (in object-oriented terminology: an abstract class).
   
   You do not need to change anything in this class, ever.
+
+  Searches leave their bookkeeping on the problem itself: getSuccessors
+  counts expansions in problem._expanded, and iterativeDeepeningAStarSearch
+  stores the counts of its last run in problem._idaStats.
   """
   
   def getStartState(self):
@@ -68,6 +73,111 @@ def tinyMazeSearch(problem):
   w = Directions.WEST
   return  [s,s,w,s,w,w,s,w]
 
+def graphSearch(problem, frontier):
+  """
+  The graph search shared by depthFirstSearch and breadthFirstSearch.
+  frontier is an empty util.Stack or util.Queue.
+
+  Each frontier entry is a node (state, action, cost, parent), where parent
+  is the node it was reached from, so every node takes constant memory and
+  the list of actions is only built for the goal.  Expanded states are kept
+  in a set.  The goal test and the expanded check happen as a node is
+  popped, and states are expanded at most once [Fig. 3.18].
+  """
+  closed = set()
+  frontier.push((problem.getStartState(), None, 0, None))
+  while not frontier.isEmpty():
+    node = frontier.pop()
+    state, action, cost, parent = node
+    if problem.isGoalState(state):
+      return pathTo(node)
+    if state in closed: continue
+    closed.add(state)
+    for nextState, nextAction, stepCost in problem.getSuccessors(state):
+      # A closed state would only be popped and skipped
+      if nextState not in closed:
+        frontier.push((nextState, nextAction, cost + stepCost, node))
+  return []
+
+def pathTo(node):
+  "Returns the actions that lead from the start to a graphSearch node."
+  actions = []
+  while node[3] != None:
+    actions.append(node[1])
+    node = node[3]
+  actions.reverse()
+  return actions
+
+# Frontiers of whole number priorities below this are util.BucketQueues
+BUCKET_LIMIT = 1 << 16
+
+def bestFirstSearch(problem, priority, frontier=None):
+  """
+  The search shared by uniformCostSearch and aStarSearch: it expands the
+  frontier state of lowest priority(state, costSoFar) first.
+
+  The frontier holds every state at most once.  When a cheaper path to a
+  state on the frontier is found, its priority is lowered in place
+  (util.IndexedPriorityQueue.update) instead of pushing it again, so the
+  frontier never grows past the number of distinct states.  The cheapest
+  path found to each state is kept as (previous state, action) in parents.
+
+  Step costs and heuristics of the Pacman problems are whole numbers, so
+  unless another frontier is given the search starts with a
+  util.BucketQueue (Dial's algorithm), whose push and pop take O(1) time.
+  Among states of equal priority it pops the last pushed, which on A*
+  follows the deepest path along a contour first.  The first priority that
+  is not a whole number below BUCKET_LIMIT moves the frontier to a
+  util.IndexedPriorityQueue.
+  """
+  start = problem.getStartState()
+  startPriority = priority(start, 0)
+  if frontier == None:
+    if isBucketPriority(startPriority): frontier = util.BucketQueue()
+    else: frontier = util.IndexedPriorityQueue()
+  buckets = isinstance(frontier, util.BucketQueue)
+  costs = {start: 0}
+  parents = {start: None}
+  closed = set()
+  frontier.push(start, startPriority)
+  while not frontier.isEmpty():
+    state = frontier.pop()
+    if problem.isGoalState(state):
+      return pathFromParents(parents, state)
+    closed.add(state)
+    cost = costs[state]
+    for nextState, nextAction, stepCost in problem.getSuccessors(state):
+      if nextState in closed: continue
+      nextCost = cost + stepCost
+      if nextState not in costs or nextCost < costs[nextState]:
+        costs[nextState] = nextCost
+        parents[nextState] = (state, nextAction)
+        nextPriority = priority(nextState, nextCost)
+        if buckets and not isBucketPriority(nextPriority):
+          frontier, buckets = heapFrontier(frontier), False
+        frontier.update(nextState, nextPriority)
+  return []
+
+def isBucketPriority(priority):
+  "Returns whether a util.BucketQueue can hold an item of this priority."
+  return type(priority) == int and 0 <= priority < BUCKET_LIMIT
+
+def heapFrontier(bucketQueue):
+  "Returns a util.IndexedPriorityQueue of the items in a util.BucketQueue."
+  frontier = util.IndexedPriorityQueue()
+  for item, priority in bucketQueue.priorities.items():
+    frontier.push(item, priority)
+  return frontier
+
+def pathFromParents(parents, state):
+  "Returns the actions that lead to state, following the bestFirstSearch parents."
+  actions = []
+  while parents[state] != None:
+    state, action = parents[state]
+    actions.append(action)
+  actions.reverse()
+  return actions
+
 def depthFirstSearch(problem):
   """
   Search the deepest nodes in the search tree first [p 74].
@@ -83,91 +193,17 @@ def depthFirstSearch(problem):
   print "Start's successors:", problem.getSuccessors(problem.getStartState())
   """
   "*** YOUR CODE HERE ***"
-  DT = {'South': Directions.SOUTH, 'North': Directions.NORTH,'West': Directions.WEST, 'East': Directions.EAST }
-  statesort = []
-  #list statesort used to store the node with the order sequence
-  DFSSTACK=util.Stack()
-  DFSSTACK.push((problem.getStartState(),statesort,0))
-  #we have to put three argument (node,action,cost) into stack
-  while not DFSSTACK.isEmpty():
-    currentNode=DFSSTACK.pop()
-    # use currentNode to store the node which pop from DFSSTACK
-    if problem.isGoalState(currentNode[0]):
-        #if currentNode[0]==goal then return currentNode[1] which is action
-        return currentNode[1]
-    elif currentNode[0] in statesort:
-        continue
-    else:
-        sucList = problem.getSuccessors(currentNode[0])
-        #retrieve the currentNode's successors and store the sucList
-        for a in sucList:
-            DFSSTACK.push((a[0],currentNode[1]+[DT[a[1]]],a[2]))
-        #push the successor into the stack  (a[0]is the successors. a[1]is the action. a[2]is the cost.)
-        statesort=statesort+[currentNode[0]]
-        #store the node which is visited
-  return []
+  return graphSearch(problem, util.Stack())
 
 def breadthFirstSearch(problem):
   "Search the shallowest nodes in the search tree first. [p 74]"
   "*** YOUR CODE HERE ***"
-  DT = {'South': Directions.SOUTH, 'North': Directions.NORTH,'West': Directions.WEST, 'East': Directions.EAST }
-  statesort = []
-  #list statesort used to store the node with the order sequence
-  BFSQUEUE=util.Queue()
-  BFSQUEUE.push((problem.getStartState(),statesort))
-  #we have to put three argument (node,action,cost) into queue
-  while not BFSQUEUE.isEmpty():
-    currentNode=BFSQUEUE.pop()
-    # use currentNode to store the node which pop from BFSQUEUE
-    if problem.isGoalState(currentNode[0]):
-    #if currentNode[0]==goal then return currentNode[1] which is action
-        return currentNode[1]
-    elif currentNode[0] in statesort:
-        continue
-    else:
-        sucList = problem.getSuccessors(currentNode[0])
-        #retrieve the currentNode's successors and store the sucList
-        for a in sucList:
-            BFSQUEUE.push((a[0],currentNode[1]+[DT[a[1]]],a[2]))
-            #push the successor into the queue (a[0]is the successors a[1]is the action a[2]is the cost)
-        statesort=statesort+[currentNode[0]]
-        #store the node which is visited
-  return []
-
+  return graphSearch(problem, util.Queue())
       
 def uniformCostSearch(problem):
   "Search the node of least total cost first. "
   "*** YOUR CODE HERE ***"
-  """
-     What is lambda?
-     It's a function that redefine the function in StayWestSearchAgent and StayEastSearchAgent 
-     And class PositionSearchProblem's def __init__(self, gameState, costFn = lambda x: 1, goal=(1,1), start=None, warn=True):
-     
-  """
-  DT = {'South': Directions.SOUTH, 'North': Directions.NORTH,'West': Directions.WEST, 'East': Directions.EAST }
-  statesort = []
-  #list statesort used to store the node with the order sequence
-  UCSQUEUE=util.PriorityQueueWithFunction(lambda x:x[2])
-  #we can use costFn=lambda which is referenced from the class PositionSearchProblem(search.SearchProblem) in SearchAgent.py
-  UCSQUEUE.push((problem.getStartState(),statesort,0))
-  #we have to put three argument (self, item, self.priorityFunction(item)) into PriorityQueueWithFunction
-  while not UCSQUEUE.isEmpty():
-    currentNode=UCSQUEUE.pop()
-    # use currentNode to store the node which pop from USCQUEUE
-    if problem.isGoalState(currentNode[0]):
-    #if currentNode[0]==goal then return currentNode[1] which is action
-        return currentNode[1]
-    elif currentNode[0] in statesort:
-        continue
-    else:
-        sucList = problem.getSuccessors(currentNode[0])
-        #retrieve the currentNode's successors and store the sucList
-        for a in sucList:
-            UCSQUEUE.push((a[0],currentNode[1]+[DT[a[1]]],currentNode[2]+a[2]))
-            #currentNode[2](is the cost from past) plus a[2](is the cost of this action) = total cost
-        statesort=statesort+[currentNode[0]]
-        #store the node which is visited
-  return []
+  return bestFirstSearch(problem, lambda state, cost: cost)
 
 def nullHeuristic(state, problem=None):
   """
@@ -179,34 +215,352 @@ def nullHeuristic(state, problem=None):
 def aStarSearch(problem, heuristic=nullHeuristic):
   "Search the node that has the lowest combined cost and heuristic first."
   "*** YOUR CODE HERE ***"
-  DT = {'South': Directions.SOUTH, 'North': Directions.NORTH,'West': Directions.WEST, 'East': Directions.EAST }
-  statesort = []
-  #list statesort used to store the node with the order sequence
-  ASTARQUEUE=util.PriorityQueueWithFunction(lambda x:x[2]+heuristic(x[0],problem))
-  #we can use heuristic like manhattanHeuristic or euclideanHeuristic and plus the costFn lambda
-  ASTARQUEUE.push((problem.getStartState(),statesort,0))
-  #we have to put three argument (self, item, self.priorityFunction(item)) into PriorityQueueWithFunction
-  while not ASTARQUEUE.isEmpty():
-    currentNode=ASTARQUEUE.pop()
-    # use currentNode to store the node which pop from ASTARQUEUE
-    if problem.isGoalState(currentNode[0]):
-    #if currentNode[0]==goal then return currentNode[1] which is action
-        return currentNode[1]
-    elif currentNode[0] in statesort:
-        continue
+  return bestFirstSearch(problem, lambda state, cost: cost + heuristic(state, problem))
+
+class BackwardProblem:
+  """
+  The search problem of a problem with a single goal state, run backward:
+  it starts at the goal, its goal is the original start and its successors
+  are the original problem's predecessors.  Its goal attribute is the
+  original start, so heuristics that read problem.goal estimate the cost
+  back to the start; other attributes come from the original problem.
+  """
+  def __init__(self, problem):
+    self.problem = problem
+    self.startState = problem.getGoalState()
+    self.goal = problem.getStartState()
+
+  def getStartState(self):
+    return self.startState
+
+  def isGoalState(self, state):
+    return state == self.goal
+
+  def getSuccessors(self, state):
+    return self.problem.getPredecessors(state)
+
+  def __getattr__(self, name):
+    return getattr(self.problem, name)
+
+def bidirectionalSearch(problem, heuristic=None, unitCost=False):
+  """
+  Searches forward from the start and backward from the goal at the same
+  time, for a problem with a single goal that has getGoalState and
+  getPredecessors (such as PositionSearchProblem).  Each step expands the
+  side with the smaller frontier.  Every time one side reaches a state the
+  other side has reached, the path through it becomes a candidate, and the
+  search stops once no unexpanded path can be cheaper than the best one:
+
+    without a heuristic, when the lowest costs on the two frontiers add up
+    to at least the best path cost, so each side only searches about half
+    the distance;
+    with a heuristic, when the lowest cost plus heuristic on either
+    frontier is at least the best path cost.  heuristic(state, problem)
+    estimates the cost to the goal forward and to the start backward (on
+    a BackwardProblem), and must be consistent.  This rule is safe but
+    loose, so it often expands more states than one sided A*.
+
+  With unitCost, every step costs 1, so the path has the fewest actions.
+  """
+  start = problem.getStartState()
+  if problem.isGoalState(start): return []
+  if heuristic == None: heuristic = nullHeuristic
+  sides = []
+  for side in [problem, BackwardProblem(problem)]:
+    state = side.getStartState()
+    startPriority = heuristic(state, side)
+    frontier = util.IndexedPriorityQueue()
+    if isBucketPriority(startPriority): frontier = util.BucketQueue()
+    frontier.push(state, startPriority)
+    # side, frontier, costs, parents, closed
+    sides.append([side, frontier, {state: 0}, {state: None}, set()])
+
+  best, meeting = None, None
+  while not sides[0][1].isEmpty() and not sides[1][1].isEmpty():
+    forwardTop, backwardTop = sides[0][1].peekPriority(), sides[1][1].peekPriority()
+    if heuristic == nullHeuristic: bound = forwardTop + backwardTop
+    else: bound = max(forwardTop, backwardTop)
+    if best != None and best <= bound: break
+
+    if len(sides[0][1]) <= len(sides[1][1]): forward = 0
+    else: forward = 1
+    side, frontier, costs, parents, closed = sides[forward]
+    otherCosts = sides[1 - forward][2]
+    state = frontier.pop()
+    closed.add(state)
+    cost = costs[state]
+    for nextState, nextAction, stepCost in side.getSuccessors(state):
+      if unitCost: stepCost = 1
+      nextCost = cost + stepCost
+      if nextState in otherCosts and (best == None or nextCost + otherCosts[nextState] < best):
+        best = nextCost + otherCosts[nextState]
+        meeting = (forward, state, nextAction, nextState)
+      if nextState in closed: continue
+      if nextState not in costs or nextCost < costs[nextState]:
+        costs[nextState] = nextCost
+        parents[nextState] = (state, nextAction)
+        nextPriority = nextCost + heuristic(nextState, side)
+        if isinstance(frontier, util.BucketQueue) and not isBucketPriority(nextPriority):
+          frontier = sides[forward][1] = heapFrontier(frontier)
+        frontier.update(nextState, nextPriority)
+
+  if meeting == None: return []
+  forward, state, action, nextState = meeting
+  forwardParents, backwardParents = sides[0][3], sides[1][3]
+  if forward == 0: forwardState, backwardState = state, nextState
+  else: forwardState, backwardState = nextState, state
+  actions = pathFromParents(forwardParents, forwardState) + [action]
+  # The backward parents point toward the goal, so they are already in order
+  while backwardParents[backwardState] != None:
+    backwardState, action = backwardParents[backwardState]
+    actions.append(action)
+  return actions
+
+def bidirectionalBreadthFirstSearch(problem):
+  "Search for the path of fewest actions from both ends at once."
+  return bidirectionalSearch(problem, unitCost=True)
+
+def bidirectionalUniformCostSearch(problem):
+  "Search for the path of least total cost from both ends at once."
+  return bidirectionalSearch(problem)
+
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic):
+  "Search from both ends at once, by cost plus heuristic to the other end."
+  return bidirectionalSearch(problem, heuristic)
+
+class JumpPointProblem:
+  """
+  A problem on a 4-connected grid of unit step costs (such as a
+  PositionSearchProblem or AnyFoodSearchProblem), seen through Jump Point
+  Search.  Its states are (position, direction), where direction is the
+  (dx, dy) of the last move, and a successor is the next jump point in a
+  direction rather than the next cell, with the number of cells jumped as
+  its cost.
+
+  Of all shortest paths, JPS only follows those that move vertically as
+  early as possible.  Moving horizontally, the search keeps going straight
+  until it reaches a goal or a cell beside which a wall has just ended
+  (there a vertical turn cannot be made earlier), so corridors are crossed
+  in one step.  Moving vertically, it may turn either way at every cell,
+  so it stops where a horizontal jump from the cell finds a jump point.
+  """
+  def __init__(self, problem):
+    self.problem = problem
+    self.walls = problem.walls
+
+  def getStartState(self):
+    return (self.problem.getStartState(), None)
+
+  def isGoalState(self, state):
+    return self.problem.isGoalState(state[0])
+
+  def isOpen(self, x, y):
+    walls = self.walls
+    return 0 <= x < walls.width and 0 <= y < walls.height and not walls[x][y]
+
+  def getSuccessors(self, state):
+    """
+    Returns the jump points reached from state, as triples (jumpPoint,
+    (direction, distance), distance).
+    """
+    (x, y), direction = state
+    if direction == None:
+      directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    elif direction[1] == 0: # Moving horizontally
+      dx = direction[0]
+      directions = [direction]
+      for dy in [1, -1]:
+        if self.isOpen(x, y + dy) and not self.isOpen(x - dx, y + dy):
+          directions.append((0, dy))
+    else:
+      directions = [direction, (1, 0), (-1, 0)]
+
+    successors = []
+    for dx, dy in directions:
+      if dy == 0: jumpPoint = self.jumpHorizontally(x, y, dx)
+      else: jumpPoint = self.jumpVertically(x, y, dy)
+      if jumpPoint != None:
+        distance = abs(jumpPoint[0] - x) + abs(jumpPoint[1] - y)
+        action = (Actions.vectorToDirection((dx, dy)), distance)
+        successors.append(((jumpPoint, (dx, dy)), action, distance))
+
+    countExpansion(self.problem, (x, y))
+    return successors
+
+  def jumpHorizontally(self, x, y, dx):
+    "Returns the jump point reached moving dx from (x,y), or None."
+    isOpen, isGoalState = self.isOpen, self.problem.isGoalState
+    while True:
+      x += dx
+      if not isOpen(x, y): return None
+      if isGoalState((x, y)): return (x, y)
+      for dy in [1, -1]:
+        if isOpen(x, y + dy) and not isOpen(x - dx, y + dy): return (x, y)
+
+  def jumpVertically(self, x, y, dy):
+    "Returns the jump point reached moving dy from (x,y), or None."
+    isOpen, isGoalState = self.isOpen, self.problem.isGoalState
+    while True:
+      y += dy
+      if not isOpen(x, y): return None
+      if isGoalState((x, y)): return (x, y)
+      if self.jumpHorizontally(x, y, 1) != None or self.jumpHorizontally(x, y, -1) != None:
+        return (x, y)
+
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+  """
+  A* over the jump points of a grid problem with unit step costs (see
+  JumpPointProblem).  It returns a path as short as aStarSearch does, after
+  expanding only the jump points, and needs the same admissible and
+  consistent heuristics.
+  """
+  jumps = bestFirstSearch(JumpPointProblem(problem),
+                          lambda state, cost: cost + heuristic(state[0], problem))
+  actions = []
+  for action, distance in jumps:
+    actions += [action] * distance
+  return actions
+
+class JunctionProblem:
+  """
+  A grid problem (such as a PositionSearchProblem or AnyFoodSearchProblem)
+  on the JunctionGraph of its layout: from a junction or dead end, each
+  successor is the far end of a corridor, so the search never stops inside
+  one.  The start may be a corridor cell, and a goal inside a corridor
+  ends that corridor early.  A successor's action is the tuple of moves
+  along the corridor and its cost the sum of the problem's costFn over
+  the cells entered.
+  """
+  def __init__(self, problem):
+    self.problem = problem
+    self.graph = distanceCalculator.getJunctionGraph(problem.layout)
+
+  def getStartState(self):
+    return self.problem.getStartState()
+
+  def isGoalState(self, state):
+    return self.problem.isGoalState(state)
+
+  def getSuccessors(self, state):
+    graph, problem = self.graph, self.problem
+    if state in graph.edges:
+      corridors = graph.edges[state]
     else:
-        sucList = problem.getSuccessors(currentNode[0])
-        #retrieve the currentNode's successors and store the sucList
-        for a in sucList:
-            ASTARQUEUE.push((a[0],currentNode[1]+[DT[a[1]]],currentNode[2]+a[2]))
-            #currentNode[2](is the cost from past) plus a[2](is the cost of this action)
-        statesort=statesort+[currentNode[0]]
-        #store the node which is visited
+      corridors = [graph.walk(state, action, next) for action, next in graph.moves[state]]
+
+    successors = []
+    for end, actions, cells in corridors:
+      cost = 0
+      for i in range(len(cells)):
+        cost += problem.costFn(cells[i])
+        if cells[i] != end and problem.isGoalState(cells[i]):
+          end, actions = cells[i], actions[:i + 1]
+          break
+      successors.append((end, actions, cost))
+    countExpansion(problem, state)
+    return successors
+
+def junctionGraphSearch(problem, heuristic=nullHeuristic):
+  """
+  Uniform cost search, or A* with a heuristic, over the junctions and dead
+  ends of a problem's layout rather than its cells (see JunctionProblem).
+  Paths cost the same as uniformCostSearch and aStarSearch find.
+  """
+  corridors = bestFirstSearch(JunctionProblem(problem),
+                              lambda state, cost: cost + heuristic(state, problem))
+  actions = []
+  for corridor in corridors:
+    actions += corridor
+  return actions
+
+def countExpansion(problem, state):
+  "Counts state as expanded by problem, for problems that keep display bookkeeping."
+  problem._expanded += 1
+  if state not in problem._visited:
+    problem._visited[state] = True
+    problem._visitedlist.append(state)
+
+# Entries kept by iterativeDeepeningAStarSearch's transposition table, unless told otherwise
+TRANSPOSITION_TABLE_SIZE = 100000
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic, tableSize=None):
+  """
+  Iterative deepening A* (IDA*): depth first searches that give up on any
+  path whose cost plus heuristic exceeds a bound, starting from the
+  heuristic of the start and raising the bound to the lowest value that
+  was over it, until a goal is found.  With an admissible heuristic the
+  path is as cheap as aStarSearch finds, but only the current path and its
+  untried successors are kept, not a frontier of every state seen.
+
+  Depth first search walks the same states many times over different
+  paths, so a transposition table remembers the lowest cost each state was
+  reached at in this iteration, and a state reached again at no lower cost
+  is skipped.  It holds at most tableSize states, dropping the least
+  recently used, so memory stays bounded however large the problem.  A
+  table much smaller than the states within the bound lets the search walk
+  the same loops over and over, which can take exponentially long.
+
+  The counts of the last search are left in problem._idaStats: iterations,
+  nodes expanded, and the peak number of states held on the path and in
+  the table.
+  """
+  if tableSize == None: tableSize = TRANSPOSITION_TABLE_SIZE
+  stats = {'iterations': 0, 'expanded': 0, 'maxPath': 0, 'maxTable': 0}
+  problem._idaStats = stats
+  start = problem.getStartState()
+  if problem.isGoalState(start): return []
+  bound = heuristic(start, problem)
+  while bound != None:
+    stats['iterations'] += 1
+    table = collections.OrderedDict([(start, 0)])
+    nextBound = None
+    # The path so far: (state, cost, successors not tried yet) for each state
+    path = [(start, 0, successorsToTry(problem, start))]
+    actions = []
+    stats['expanded'] += 1
+    while path:
+      state, cost, successors = path[-1]
+      if not successors:
+        path.pop()
+        if actions: actions.pop()
+        continue
+      nextState, action, stepCost = successors.pop()
+      nextCost = cost + stepCost
+      f = nextCost + heuristic(nextState, problem)
+      if f > bound:
+        if nextBound == None or f < nextBound: nextBound = f
+        continue
+      if nextState in table:
+        seenCost = table.pop(nextState)
+        table[nextState] = min(seenCost, nextCost) # Now the most recently used
+        if seenCost <= nextCost: continue
+      else:
+        table[nextState] = nextCost
+        if len(table) > tableSize: table.popitem(last=False)
+      if problem.isGoalState(nextState):
+        return actions + [action]
+      path.append((nextState, nextCost, successorsToTry(problem, nextState)))
+      actions.append(action)
+      stats['expanded'] += 1
+      stats['maxPath'] = max(stats['maxPath'], len(path))
+      stats['maxTable'] = max(stats['maxTable'], len(table))
+    bound = nextBound
   return []
-    
-  
+
+def successorsToTry(problem, state):
+  "Returns the successors of state, last first, for popping in order."
+  successors = list(problem.getSuccessors(state))
+  successors.reverse()
+  return successors
+
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalBreadthFirstSearch
+biucs = bidirectionalUniformCostSearch
+biastar = bidirectionalAStarSearch
+jps = jumpPointSearch
+jgs = junctionGraphSearch
+idastar = iterativeDeepeningAStarSearch
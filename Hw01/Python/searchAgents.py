@@ -35,6 +35,7 @@ import util
 import time
 import search
 import searchAgents
+import distanceCalculator
 
 class GoWestAgent(Agent):
   "An agent that goes West until it can't."
@@ -144,6 +145,8 @@ class PositionSearchProblem(search.SearchProblem):
     goal: A position in the gameState
     """
     self.walls = gameState.getWalls()
+    self.layout = gameState.data.layout
+    self.moves = self.layout.moves
     self.startState = gameState.getPacmanPosition()
     if start != None: self.startState = start
     self.goal = goal
@@ -183,23 +186,40 @@ class PositionSearchProblem(search.SearchProblem):
     """
     
     successors = []
-    for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-      x,y = state
-      dx, dy = Actions.directionToVector(action)
-      nextx, nexty = int(x + dx), int(y + dy)
-      if not self.walls[nextx][nexty]:
-        nextState = (nextx, nexty)
-        cost = self.costFn(nextState)
-        successors.append( ( nextState, action, cost) )
+    for action, nextState in self.moves[state]:
+      cost = self.costFn(nextState)
+      successors.append( ( nextState, action, cost) )
         
     # Bookkeeping for display purposes
     self._expanded += 1 
     if state not in self._visited:
       self._visited[state] = True
       self._visitedlist.append(state)
-      
+
     return successors
 
+  def getGoalState(self):
+    return self.goal
+
+  def getPredecessors(self, state):
+    """
+    Returns the states one move before state, as triples (predecessor,
+    action, stepCost): the action takes Pacman from predecessor to state at
+    a cost of stepCost.  Used to search backward from the goal.
+    """
+    predecessors = []
+    cost = self.costFn(state)
+    for action, previousState in self.moves[state]:
+      predecessors.append( ( previousState, Actions.reverseDirection(action), cost) )
+
+    # Bookkeeping for display purposes
+    self._expanded += 1
+    if state not in self._visited:
+      self._visited[state] = True
+      self._visitedlist.append(state)
+
+    return predecessors
+
   def getCostOfActions(self, actions):
     """
     Returns the cost of a particular sequence of actions.  If those actions
@@ -252,6 +272,15 @@ def euclideanHeuristic(position, problem, info={}):
   xy2 = problem.goal
   return ( (xy1[0] - xy2[0]) ** 2 + (xy1[1] - xy2[1]) ** 2 ) ** 0.5
 
+def landmarkHeuristic(position, problem, info={}):
+  """
+  The landmark (ALT) heuristic for a PositionSearchProblem: a lower bound on
+  the maze distance to the goal from the distances to a few landmark cells
+  (see distanceCalculator.LandmarkIndex).  Admissible for unit step costs.
+  """
+  landmarks = distanceCalculator.getLandmarkIndex(problem.layout)
+  return landmarks.lowerBound(position, problem.goal)
+
 #####################################################
 # This portion is incomplete.  Time to write code!  #
 #####################################################
@@ -268,6 +297,7 @@ class CornersProblem(search.SearchProblem):
     Stores the walls, pacman's starting position and corners.
     """
     self.walls = startingGameState.getWalls()
+    self.moves = startingGameState.data.layout.moves
     self.startingPosition = startingGameState.getPacmanPosition()
     top, right = self.walls.height-2, self.walls.width-2 
     self.corners = ((1,1), (1,top), (right, 1), (right, top))
@@ -277,26 +307,36 @@ class CornersProblem(search.SearchProblem):
     self._expanded = 0 # Number of search nodes expanded
     
     "*** YOUR CODE HERE ***"
-    self.cornervisted=[False,False,False,False]
-    #we have to set initial state and we set four corners not have been visited
-    self.Startstate=(self.startingPosition,self.cornervisted)
-    #And the Startstate is like(Position X,Position Y,[Boolean1,Boolean2,Boolean3,Boolean4])
+    # A state is one int, cellIndex * 16 + visited: the number of Pacman's
+    # cell in the layout's DistanceOracle, and a bit for each corner visited
+    self.oracle = distanceCalculator.getDistanceOracle(startingGameState.data.layout)
+    cellIndex = self.oracle.cellIndex
+    self.cornerIndexes = [cellIndex.get(corner) for corner in self.corners]
+    cornerBits = {}
+    for i, corner in enumerate(self.cornerIndexes):
+      if corner != None: cornerBits[corner] = cornerBits.get(corner, 0) | (1 << i)
+    # successorTable[cell] lists (action, next cell, corner bits of next cell)
+    self.successorTable = []
+    for cell in self.oracle.cells:
+      self.successorTable.append([(action, cellIndex[next], cornerBits.get(cellIndex[next], 0))
+                                  for action, next in self.moves[cell]])
+    start = cellIndex[self.startingPosition]
+    self.Startstate = start * 16 + cornerBits.get(start, 0)
+    # The shortest tour of the unvisited corners, memoized by cornersHeuristic
+    self.heuristicInfo = {}
     # For display purposes
     self._visited, self._visitedlist, self._expanded = {}, [], 0
   
   def getStartState(self):
     "Returns the start state (in your state space, not the full Pacman state space)"
     "*** YOUR CODE HERE ***"
-    #just like Startstate
     return self.Startstate
   
   def isGoalState(self, state):
     "Returns whether this search state is a goal state of the problem"
     "*** YOUR CODE HERE ***"
-    (x,y),cornersvisited=state
-    #because state like the Startstate is (Position X,Position Y,[Boolean1,Boolean2,Boolean3,Boolean4])
-    #(cornersvisited==[True,True,True,True])if it is true then return
-    return (cornersvisited==[True,True,True,True])
+    return state & 15 == 15
+
        
   def getSuccessors(self, state):
     """
@@ -309,38 +349,9 @@ class CornersProblem(search.SearchProblem):
      required to get there, and 'stepCost' is the incremental 
      cost of expanding to that successor
     """
-    successors = []
-    for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-        # Add a successor state to the successor list if the action is legal
-        # Here's a code snippet for figuring out whether a new position hits a wall:
-        #   x,y = currentPosition
-        #   dx, dy = Actions.directionToVector(action)
-        #   nextx, nexty = int(x + dx), int(y + dy)
-        #   hitsWall = self.walls[nextx][nexty]
-        "*** YOUR CODE HERE ***"
-        (x,y),cornervisted = state
-        #because state like the Startstate is (Position X,Position Y,[Boolean1,Boolean2,Boolean3,Boolean4])
-        dx,dy = Actions.directionToVector(action)
-        #the action to nextx and nexty
-        nextx, nexty = int(x + dx), int(y + dy)
-        nextcornersvisited=cornervisted[:]
-        if not self.walls[nextx][nexty]:
-        #nextx,nexty is not wall then
-            NumOfFood=0
-            for corner in self.corners:
-            #self.corners have four corner
-                if ((nextx, nexty)==corner):
-                    #if next position == any corner of four then break the forloop which means can eat the food in the corner
-                    break
-                NumOfFood+=1
-                #if can't eat any food in the corner then NumOfFood==4
-            if (NumOfFood<4):
-                nextcornersvisited[NumOfFood]=True
-                #if can eat any food in the corner then set nextcornersvisited[NumOfFood]=True
-            nextState = ((nextx, nexty),nextcornersvisited)
-            #because state like the Startstate is (Position X,Position Y,[Boolean1,Boolean2,Boolean3,Boolean4])
-            successors.append( ( nextState, action, 1) )
-            #append the ( nextState, action, 1(cost)) on the tail of successor
+    visited = state & 15
+    successors = [((next << 4) | visited | bits, action, 1)
+                  for action, next, bits in self.successorTable[state >> 4]]
     self._expanded += 1
     return successors
                                   
@@ -376,43 +387,39 @@ def cornersHeuristic(state, problem):
   walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
   
   "*** YOUR CODE HERE ***"
-  currentPosition, cornersVisited = state
-  #currentPosition=(x,y),corner that has been visited [boolen0,boolean1,boolean2,boolean3]
-  
-  NextCornersVisted=cornersVisited[:]
-  NextPosition = currentPosition[:]
-  #print NextCornersVisted
-  #print NextPosition
-  cost = 0
-
-  for i in range(4):
-  #compute every currentPosition to four corners
-    DistToCorners =[0,0,0,0]
-    NumOfCorner = 0
-    for corner in NextCornersVisted:
-        DistToCorners[NumOfCorner]=util.manhattanDistance(NextPosition,corners[NumOfCorner])
-        NumOfCorner+=1
-
-    NumOfCloset=0
-    NumOfCorner=0
-    
-    
-    for dist in DistToCorners:
-    #compute the closet corners
-        if(NextCornersVisted[NumOfCloset]):
-            NumOfCloset=NumOfCorner
-        if (not NextCornersVisted[NumOfCorner]) and ( dist < DistToCorners[NumOfCloset]):
-            NumOfCloset=NumOfCorner
-        NumOfCorner+=1
-    
-    if not cornersVisited[NumOfCloset]:
-    #set the cost and set the NextPosition and set CornersVisted
-        cost+=DistToCorners[NumOfCloset]
-        NextPosition=corners[NumOfCloset][:]
-        NextCornersVisted[NumOfCloset]=True
-
-                
-  return cost
+  # The exact length of the shortest walk through the unvisited corners, in
+  # maze distances: the cost of the rest of the path, so A* only expands
+  # states on shortest paths.  It tries each unvisited corner first, and
+  # the shortest tour from there through the others comes from cornerTour.
+  cell, visited = state >> 4, state & 15
+  if visited == 15: return 0
+  distances, numCells = problem.oracle.distances, problem.oracle.numCells
+  best = None
+  for i, corner in enumerate(problem.cornerIndexes):
+    if visited & (1 << i) or corner == None: continue
+    cost = distances[cell * numCells + corner] + cornerTour(problem, i, visited | (1 << i))
+    if best == None or cost < best: best = cost
+  if best == None: return 0
+  return best
+
+def cornerTour(problem, first, visited):
+  """
+  Returns the maze length of the shortest walk that starts at corner first
+  and visits every corner not in the visited bits, memoized in
+  problem.heuristicInfo.
+  """
+  key = (first, visited)
+  if key not in problem.heuristicInfo:
+    distances, numCells = problem.oracle.distances, problem.oracle.numCells
+    start = problem.cornerIndexes[first]
+    best = None
+    for i, corner in enumerate(problem.cornerIndexes):
+      if visited & (1 << i) or corner == None: continue
+      cost = distances[start * numCells + corner] + cornerTour(problem, i, visited | (1 << i))
+      if best == None or cost < best: best = cost
+    if best == None: best = 0
+    problem.heuristicInfo[key] = best
+  return problem.heuristicInfo[key]
 
 class AStarCornersAgent(SearchAgent):
   "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -425,13 +432,26 @@ class FoodSearchProblem:
   A search problem associated with finding the a path that collects all of the 
   food (dots) in a Pacman game.
   
-  A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
-    pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-    foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food 
+  A search state in this problem is a tuple ( cellIndex, foodBits ) where
+    cellIndex: the number of Pacman's cell in the layout's DistanceOracle
+               (see distanceCalculator.py); its (x,y) is oracle.cells[cellIndex]
+    foodBits:  an int with bit i set while the food at foodCells[i] remains
+  Both are ints, so states are cheap to make, hash and compare.
   """
   def __init__(self, startingGameState):
-    self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
     self.walls = startingGameState.getWalls()
+    self.moves = startingGameState.data.layout.moves
+    self.oracle = distanceCalculator.getDistanceOracle(startingGameState.data.layout)
+    cellIndex = self.oracle.cellIndex
+    self.foodCells = [cellIndex[food] for food in startingGameState.getFood().asList()]
+    foodBits = dict([(cell, 1 << i) for i, cell in enumerate(self.foodCells)])
+    # successorTable[cell] lists (action, next cell, foodBits without the food there)
+    allFood = (1 << len(self.foodCells)) - 1
+    self.successorTable = []
+    for cell in self.oracle.cells:
+      self.successorTable.append([(action, cellIndex[next], allFood & ~foodBits.get(cellIndex[next], 0))
+                                  for action, next in self.moves[cell]])
+    self.start = (cellIndex[startingGameState.getPacmanPosition()], allFood)
     self.startingGameState = startingGameState
     self._expanded = 0
     self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -440,26 +460,27 @@ class FoodSearchProblem:
     return self.start
   
   def isGoalState(self, state):
-    return state[1].count() == 0
+    return state[1] == 0
 
   def getSuccessors(self, state):
     "Returns successor states, the actions they require, and a cost of 1."
-    successors = []
     self._expanded += 1
-    for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-      x,y = state[0]
-      dx, dy = Actions.directionToVector(direction)
-      nextx, nexty = int(x + dx), int(y + dy)
-      if not self.walls[nextx][nexty]:
-        nextFood = state[1].copy()
-        nextFood[nextx][nexty] = False
-        successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
-    return successors
+    foodBits = state[1]
+    return [((next, foodBits & keep), direction, 1)
+            for direction, next, keep in self.successorTable[state[0]]]
+
+  def getPosition(self, state):
+    "Returns Pacman's (x,y) position in a search state."
+    return self.oracle.cells[state[0]]
+
+  def getFood(self, state):
+    "Returns the (x,y) positions of the food left in a search state."
+    return [self.oracle.cells[cell] for i, cell in enumerate(self.foodCells) if state[1] >> i & 1]
 
   def getCostOfActions(self, actions):
     """Returns the cost of a particular sequence of actions.  If those actions
     include an illegal move, return 999999"""
-    x,y= self.getStartState()[0]
+    x,y= self.getPosition(self.getStartState())
     cost = 0
     for action in actions:
       # figure out the next state and see whether it's legal
@@ -488,9 +509,9 @@ def foodHeuristic(state, problem):
   your heuristic is *not* consistent, and probably not admissible!  On the other hand,
   inadmissible or inconsistent heuristics may find optimal solutions, so be careful.
   
-  The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a 
-  Grid (see game.py) of either True or False. You can call foodGrid.asList()
-  to get a list of food coordinates instead.
+  The state is a tuple ( cellIndex, foodBits ) of ints (see FoodSearchProblem);
+  problem.getPosition(state) and problem.getFood(state) give Pacman's position
+  and the food left as (x,y) coordinates.
   
   If you want access to info like walls, capsules, etc., you can query the problem.
   For example, problem.walls gives you a Grid of where the walls are.
@@ -501,23 +522,67 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount'] = problem.walls.count()
   Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount']
   """
-  position, foodGrid = state
+  cell, foodBits = state
   "*** YOUR CODE HERE ***"
-  
+  # The maze distance to the nearest food, plus the weight of a minimum
+  # spanning tree of the food in maze distances: any path eating all the
+  # food walks to some food first, then along a path joining all of it,
+  # which weighs at least the tree.  Eating a food takes at most a step off
+  # either part, so the heuristic is consistent.  Trees are memoized in
+  # problem.heuristicInfo by foodBits.
+  if foodBits == 0: return 0
+  distances, numCells = problem.oracle.distances, problem.oracle.numCells
+  foodCells = [food for i, food in enumerate(problem.foodCells) if foodBits >> i & 1]
+  start = cell * numCells
+  nearest = min([distances[start + food] for food in foodCells])
+  if foodBits not in problem.heuristicInfo:
+    problem.heuristicInfo[foodBits] = spanningTreeWeight(foodCells, distances, numCells)
+  return nearest + problem.heuristicInfo[foodBits]
+
+def spanningTreeWeight(cells, distances, numCells):
+  """
+  Returns the weight of a minimum spanning tree of the given cells, with
+  the maze distances of a DistanceOracle as edge weights (Prim's algorithm).
+  """
+  if not cells: return 0
+  # closest[i] is the distance from cells[i] to the tree so far
+  row = cells[0] * numCells
+  others = cells[1:]
+  closest = [distances[row + cell] for cell in others]
+  weight = 0
+  while others:
+    i = closest.index(min(closest))
+    weight += closest[i]
+    row = others[i] * numCells
+    del others[i], closest[i]
+    for j in range(len(others)):
+      d = distances[row + others[j]]
+      if d < closest[j]: closest[j] = d
+  return weight
+
 class ClosestDotSearchAgent(SearchAgent):
   "Search for all food using a sequence of searches"
   def registerInitialState(self, state):
+    """
+    Plans the whole route at once.  Rather than searching again after every
+    dot (as findPathToClosestDot would), it keeps a DistanceField of the
+    distance from every cell to the closest dot left, which is updated
+    around each dot as it is eaten.  The closest dot is reached by always
+    stepping to a neighbor one step closer.
+    """
     self.actions = []
-    currentState = state
-    while(currentState.getFood().count() > 0): 
-      nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
-      self.actions += nextPathSegment
-      for action in nextPathSegment: 
-        legal = currentState.getLegalActions()
-        if action not in legal: 
-          t = (str(action), str(currentState))
-          raise Exception, 'findPathToClosestDot returned an illegal move: %s!\n%s' % t
-        currentState = currentState.generateSuccessor(0, action)
+    moves = state.data.layout.moves
+    position = state.getPacmanPosition()
+    field = distanceCalculator.DistanceField(state.data.layout, state.getFood().asList())
+    while field.numSources() > 0:
+      distance = field.distance(position)
+      if distance == None: raise Exception, 'Some food cannot be reached from ' + str(position)
+      while distance > 0:
+        for action, next in moves[position]:
+          if field.distance(next) == distance - 1: break
+        self.actions.append(action)
+        position, distance = next, distance - 1
+      field.removeSource(position)
     self.actionIndex = 0
     print 'Path found with cost %d.' % len(self.actions)
     
@@ -530,7 +595,7 @@ class ClosestDotSearchAgent(SearchAgent):
     problem = AnyFoodSearchProblem(gameState)
 
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    return search.bfs(problem)
   
 class AnyFoodSearchProblem(PositionSearchProblem):
   """
@@ -554,6 +619,8 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
     # Store info for the PositionSearchProblem (no need to change this)
     self.walls = gameState.getWalls()
+    self.layout = gameState.data.layout
+    self.moves = self.layout.moves
     self.startState = gameState.getPacmanPosition()
     self.costFn = lambda x: 1
     self._visited, self._visitedlist, self._expanded = {}, [], 0
@@ -566,18 +633,60 @@ class AnyFoodSearchProblem(PositionSearchProblem):
     x,y = state
     
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    return self.food[x][y]
 
 ##################
 # Mini-contest 1 #
 ##################
 
 class ApproximateSearchAgent(Agent):
-  "Implement your contest entry here.  Change anything but the class name."
+  """
+  Implement your contest entry here.  Change anything but the class name.
+
+  Plans a short route through all the food as a travelling salesman tour
+  over maze distances: a nearest neighbor tour and a nearest insertion tour
+  are built from the layout's DistanceOracle, the shorter one is improved
+  by 2-opt and Or-opt moves for at most budget seconds (-a budget=0.5), and
+  the tour is walked along shortest paths.
+  """
+  def __init__(self, budget='0.5'):
+    self.budget = float(budget)
   
   def registerInitialState(self, state):
     "This method is called before any moves are made."
     "*** YOUR CODE HERE ***"
+    starttime = time.time()
+    deadline = starttime + self.budget
+    layout = state.data.layout
+    oracle = distanceCalculator.getDistanceOracle(layout)
+    points = [state.getPacmanPosition()] + state.getFood().asList()
+    dist = [[oracle.distance(a, b) for b in points] for a in points]
+
+    def report(tour, how):
+      print('[ApproximateSearchAgent] tour length %d after %.3f seconds (%s)' %
+            (tourLength(tour, dist), time.time() - starttime, how))
+
+    tour = nearestNeighborTour(dist)
+    report(tour, 'nearest neighbor')
+    insertion = nearestInsertionTour(dist)
+    report(insertion, 'nearest insertion')
+    if tourLength(insertion, dist) < tourLength(tour, dist): tour = insertion
+    while time.time() < deadline:
+      improved = twoOptPass(tour, dist, deadline)
+      improved = orOptPass(tour, dist, deadline) or improved
+      report(tour, '2-opt and Or-opt')
+      if not improved: break
+
+    # Walk the tour, skipping food already eaten on the way to earlier food
+    self.actions = []
+    position, eaten = points[0], set()
+    for point in tour[1:]:
+      if points[point] in eaten: continue
+      for action, position in shortestPath(oracle, layout.moves, position, points[point]):
+        self.actions.append(action)
+        eaten.add(position)
+    self.actionIndex = 0
+    print('Path found with cost %d in %.1f seconds' % (len(self.actions), time.time() - starttime))
     
   def getAction(self, state):
     """
@@ -586,13 +695,138 @@ class ApproximateSearchAgent(Agent):
     Directions.{North, South, East, West, Stop}
     """ 
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
-    
+    i = self.actionIndex
+    self.actionIndex += 1
+    if i < len(self.actions):
+      return self.actions[i]
+    return Directions.STOP
+
+def shortestPath(oracle, moves, start, goal):
+  """
+  Returns a shortest path from start to goal as (action, position reached)
+  pairs, always stepping to a neighbor one step closer to goal.
+  """
+  path = []
+  distance = oracle.distance(start, goal)
+  while distance > 0:
+    for action, next in moves[start]:
+      if oracle.distance(next, goal) == distance - 1: break
+    path.append((action, next))
+    start, distance = next, distance - 1
+  return path
+
+def tourLength(tour, dist):
+  "Returns the length of a path visiting the points of tour in order."
+  return sum([dist[tour[i]][tour[i + 1]] for i in range(len(tour) - 1)])
+
+def nearestNeighborTour(dist):
+  """
+  Returns a tour of all the points of distance matrix dist that starts at
+  point 0 and always goes on to the closest point not visited yet.
+  """
+  tour = [0]
+  left = set(range(1, len(dist)))
+  while left:
+    row = dist[tour[-1]]
+    next = min(left, key=row.__getitem__)
+    tour.append(next)
+    left.remove(next)
+  return tour
+
+def nearestInsertionTour(dist):
+  """
+  Returns a tour of all the points of distance matrix dist that starts at
+  point 0, built by repeatedly taking the point closest to the tour so far
+  and inserting it where it lengthens the tour least.
+  """
+  tour = [0]
+  left = range(1, len(dist))
+  closest = [dist[0][point] for point in left] # Distance from each point left to the tour
+  while left:
+    i = closest.index(min(closest))
+    point = left.pop(i)
+    del closest[i]
+    row = dist[point]
+    # Inserting at the end of the path only adds the edge to the last point
+    bestCost, bestPlace = row[tour[-1]], len(tour)
+    for place in range(1, len(tour)):
+      a, b = tour[place - 1], tour[place]
+      cost = dist[a][point] + row[b] - dist[a][b]
+      if cost < bestCost: bestCost, bestPlace = cost, place
+    tour.insert(bestPlace, point)
+    for j in range(len(left)):
+      if row[left[j]] < closest[j]: closest[j] = row[left[j]]
+  return tour
+
+def twoOptPass(tour, dist, deadline):
+  """
+  Reverses every stretch tour[i..j] that shortens the tour, in place, until
+  none does or time runs out at deadline.  The first point (the start)
+  stays first, and the last point is free to change since the tour need
+  not come back.  Returns whether the tour got shorter.
+  """
+  improved, changed = False, True
+  n = len(tour)
+  while changed and time.time() < deadline:
+    changed = False
+    for i in range(1, n - 1):
+      for j in range(i + 1, n):
+        a, b, c = tour[i - 1], tour[i], tour[j]
+        delta = dist[a][c] - dist[a][b]
+        if j + 1 < n:
+          d = tour[j + 1]
+          delta += dist[b][d] - dist[c][d]
+        if delta < 0:
+          tour[i:j + 1] = tour[i:j + 1][::-1]
+          improved = changed = True
+      if time.time() > deadline: break
+  return improved
+
+def orOptPass(tour, dist, deadline):
+  """
+  Moves every run of one to three consecutive points to wherever in the
+  tour (either way round) makes it shortest, in place, until no move
+  shortens the tour or time runs out at deadline.  Returns whether the
+  tour got shorter.
+  """
+  improved, changed = False, True
+  n = len(tour)
+  while changed and time.time() < deadline:
+    changed = False
+    for length in [1, 2, 3]:
+      for i in range(1, n - length + 1):
+        first, last = tour[i], tour[i + length - 1]
+        before = tour[i - 1]
+        if i + length < n:
+          after = tour[i + length]
+          saved = dist[before][first] + dist[last][after] - dist[before][after]
+        else:
+          saved = dist[before][first]
+        rest = tour[:i] + tour[i + length:]
+        bestCost, bestPlace, bestReversed = saved, None, False
+        for place in range(1, len(rest) + 1):
+          a = rest[place - 1]
+          if place < len(rest):
+            b = rest[place]
+            forward = dist[a][first] + dist[last][b] - dist[a][b]
+            backward = dist[a][last] + dist[first][b] - dist[a][b]
+          else:
+            forward, backward = dist[a][first], dist[a][last]
+          if forward < bestCost: bestCost, bestPlace, bestReversed = forward, place, False
+          if backward < bestCost: bestCost, bestPlace, bestReversed = backward, place, True
+        if bestPlace != None:
+          run = tour[i:i + length]
+          if bestReversed: run.reverse()
+          tour[:] = rest[:bestPlace] + run + rest[bestPlace:]
+          improved = changed = True
+      if time.time() > deadline: break
+  return improved
+
 def mazeDistance(point1, point2, gameState):
   """
-  Returns the maze distance between any two points, using the search functions
-  you have already built.  The gameState can be any game state -- Pacman's position
-  in that state is ignored.
+  Returns the maze distance between any two points, looked up in the layout's
+  DistanceOracle (see distanceCalculator.py).  The gameState can be any game
+  state -- Pacman's position in that state is ignored.
   
   Example usage: mazeDistance( (2,4), (5,6), gameState)
   
@@ -603,5 +837,4 @@ def mazeDistance(point1, point2, gameState):
   walls = gameState.getWalls()
   assert not walls[x1][y1], 'point1 is a wall: ' + point1
   assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-  prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False)
-  return len(search.bfs(prob))
\ No newline at end of file
+  return distanceCalculator.getDistanceOracle(gameState.data.layout).distance(point1, point2)
\ No newline at end of file
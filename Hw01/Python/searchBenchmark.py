@@ -0,0 +1,180 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+Compares search functions and heuristics on large mazes: for each maze and
+method it prints the nodes expanded, the cost of the path found, the time
+taken, the nodes expanded per second and the peak memory of the process so
+far.  Besides layouts from the layouts directory, it can generate random
+mazes of any size.  With -p food it solves FoodSearchProblems instead.
+
+  python searchBenchmark.py
+  python searchBenchmark.py -l bigMaze,openMaze -s 201 -k 16
+  python searchBenchmark.py -p food
+"""
+
+import layout, pacman, search, searchAgents, distanceCalculator
+import random, time
+try:
+  import resource
+except ImportError:
+  resource = None # Not on Windows; memory is not reported
+from optparse import OptionParser
+
+# (search function, heuristic) pairs compared by default
+METHODS = [('astar', 'nullHeuristic'),
+           ('astar', 'manhattanHeuristic'),
+           ('astar', 'euclideanHeuristic'),
+           ('astar', 'landmarkHeuristic'),
+           ('jps', 'manhattanHeuristic'),
+           ('jgs', 'manhattanHeuristic')]
+
+# The same for FoodSearchProblems
+FOOD_METHODS = [('astar', 'foodHeuristic')]
+
+def generateMaze(width, height, seed=None, loops=0.0):
+  """
+  Returns the text of a random maze layout of the given (odd) width and
+  height.  The maze is carved by a depth first search from (1,1), so there
+  is exactly one path between any two cells; with loops, that fraction of
+  the remaining inner walls is knocked down too, making many paths.  Pacman
+  starts in the top right corner and the single food is at (1,1).
+  """
+  rand = random.Random(seed)
+  wall = [[True for y in range(height)] for x in range(width)]
+  wall[1][1] = False
+  stack = [(1, 1)]
+  while stack:
+    x, y = stack[-1]
+    options = [(dx, dy) for dx, dy in [(2, 0), (-2, 0), (0, 2), (0, -2)]
+               if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and wall[x + dx][y + dy]]
+    if not options:
+      stack.pop()
+      continue
+    dx, dy = rand.choice(options)
+    wall[x + dx / 2][y + dy / 2] = False
+    wall[x + dx][y + dy] = False
+    stack.append((x + dx, y + dy))
+  for x in range(1, width - 1):
+    for y in range(1, height - 1):
+      # An inner wall lies between two cells in a row or in a column
+      if wall[x][y] and (x % 2) != (y % 2) and rand.random() < loops:
+        wall[x][y] = False
+
+  cells = [['%' for x in range(width)] for y in range(height)]
+  for x in range(width):
+    for y in range(height):
+      if not wall[x][y]: cells[height - 1 - y][x] = ' '
+  cells[height - 2][1] = '.'
+  cells[1][width - 2] = 'P'
+  return [''.join(row) for row in cells]
+
+def makeProblem(mazeLayout, problemType='position'):
+  """
+  Returns a PositionSearchProblem for a maze: from Pacman's start to (1,1),
+  or to the open cell farthest from the start when (1,1) is a wall.  With
+  problemType 'food', returns the FoodSearchProblem of the maze instead.
+  """
+  state = pacman.GameState()
+  state.initialize(mazeLayout, 0)
+  if problemType == 'food':
+    return searchAgents.FoodSearchProblem(state)
+  goal = (1, 1)
+  if mazeLayout.walls[1][1]:
+    oracle = distanceCalculator.getDistanceOracle(mazeLayout)
+    start = state.getPacmanPosition()
+    goal = max(oracle.cells, key=lambda cell: oracle.distance(start, cell))
+  return searchAgents.PositionSearchProblem(state, goal=goal, warn=False)
+
+def runMethod(mazeLayout, fn, heuristic, problemType='position'):
+  """
+  Returns (nodes expanded, path cost, seconds, IDA* counts) for one search;
+  the counts are None for searches other than
+  iterativeDeepeningAStarSearch (idastar).
+  """
+  problem = makeProblem(mazeLayout, problemType)
+  func = getattr(search, fn)
+  start = time.time()
+  if heuristic == None:
+    actions = func(problem)
+  else:
+    heur = getattr(searchAgents, heuristic, None) or getattr(search, heuristic)
+    actions = func(problem, heuristic=heur)
+  seconds = time.time() - start
+  return problem._expanded, problem.getCostOfActions(actions), seconds, getattr(problem, '_idaStats', None)
+
+def peakMemory():
+  "Returns the peak memory use of this process so far, in MB, or None."
+  if resource == None: return None
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0 # KB on Linux
+
+def runBenchmark(mazes, methods, problemType='position'):
+  print '%-20s %-24s %9s %6s %8s %9s %7s' % ('maze', 'method', 'expanded', 'cost', 'seconds', 'nodes/s', 'peak MB')
+  for name, mazeLayout in mazes:
+    start = time.time()
+    if problemType == 'food':
+      distanceCalculator.getDistanceOracle(mazeLayout)
+      label = '(distances)'
+    else:
+      distanceCalculator.getLandmarkIndex(mazeLayout)
+      label = '(%d landmarks)' % distanceCalculator.NUM_LANDMARKS
+    print '%-20s %-24s %9s %6s %8.3f' % (name, label, '', '', time.time() - start)
+    for fn, heuristic in methods:
+      expanded, cost, seconds, idaStats = runMethod(mazeLayout, fn, heuristic, problemType)
+      method = fn
+      if heuristic != None: method += ',' + heuristic
+      rate = expanded / max(seconds, 0.001)
+      memory = peakMemory()
+      if memory == None: memory = '-'
+      else: memory = '%.1f' % memory
+      print '%-20s %-24s %9d %6d %8.3f %9d %7s' % (name, method, expanded, cost, seconds, rate, memory)
+      if idaStats != None:
+        print '%-20s %-24s %d iterations, at most %d states on the path and %d in the table' % \
+              ('', '', idaStats['iterations'], idaStats['maxPath'], idaStats['maxTable'])
+
+def readCommand(argv):
+  parser = OptionParser('USAGE: python searchBenchmark.py <options>')
+  parser.add_option('-p', '--problem', dest='problem', type='choice', choices=['position', 'food'],
+                    default='position', help='Search problem to solve: position or food (default %default)')
+  parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                    help='Comma separated layouts to search (default bigMaze,bigSearch, or '
+                         'tinySearch,smallSearch,trickySearch for food)')
+  parser.add_option('-s', '--size', dest='size', type='int', default=101,
+                    help='Width and height of the generated maze; 0 for none (default %default)')
+  parser.add_option('--loops', dest='loops', type='float', default=0.1,
+                    help='Fraction of inner walls knocked out of the generated maze (default %default)')
+  parser.add_option('--seed', dest='seed', type='int', default=0,
+                    help='Seed for the generated maze (default %default)')
+  parser.add_option('-k', '--landmarks', dest='landmarks', type='int', default=8,
+                    help='Landmarks for landmarkHeuristic (default %default)')
+  parser.add_option('-m', '--methods', dest='methods', default=None,
+                    help='Comma separated fn or fn:heuristic to run instead of the defaults')
+  options, otherjunk = parser.parse_args(argv)
+  if len(otherjunk) != 0:
+    raise Exception('Command line input not understood: ' + str(otherjunk))
+  return options
+
+if __name__ == '__main__':
+  import sys
+  options = readCommand(sys.argv[1:])
+  layouts = options.layouts
+  if layouts == None and options.problem == 'food':
+    layouts = 'tinySearch,smallSearch,trickySearch'
+  elif layouts == None:
+    layouts = 'bigMaze,bigSearch'
+  mazes = [(name, layout.getLayout(name)) for name in layouts.split(',') if name]
+  if options.size > 0 and options.problem == 'position':
+    size = options.size | 1 # The maze generator needs odd sizes
+    text = generateMaze(size, size, options.seed, options.loops)
+    mazes.append(('maze%d' % size, layout.Layout(text)))
+  methods = METHODS
+  if options.problem == 'food': methods = FOOD_METHODS
+  if options.methods != None:
+    methods = [(method.split(':') + [None])[:2] for method in options.methods.split(',')]
+  distanceCalculator.NUM_LANDMARKS = options.landmarks
+  runBenchmark(mazes, methods, options.problem)
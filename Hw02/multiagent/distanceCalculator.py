@@ -0,0 +1,176 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+Exact maze distances between every pair of open cells of a layout.
+
+  oracle = getDistanceOracle(gameState.data.layout)
+  oracle.distance((1,1), (5,3))        # the maze distance
+  oracle.nearest((1,1), food.asList()) # (distance, position) of the closest
+
+The distances are found once per layout, by a breadth first search from
+every open cell, and kept in one array of 16-bit ints.  When the layout was
+loaded from a file they are also saved in its compiled layout cache (see
+layout.py), so later runs only read them back.
+
+For layouts too large for all pairs, a LandmarkIndex keeps the distances
+from a few landmark cells only, which give lower bounds on every distance.
+"""
+
+import array, marshal, os
+
+# The distance between cells that cannot reach each other
+UNREACHABLE = 65535
+
+DISTANCES_VERSION = 1
+
+# Landmarks per LandmarkIndex, unless getLandmarkIndex is told otherwise
+NUM_LANDMARKS = 8
+
+_oracles = {}
+_landmarkIndexes = {}
+
+def getDistanceOracle(layout):
+  "Returns the DistanceOracle of a layout, building it on first use."
+  key = layout.getLayoutHash()
+  if key not in _oracles:
+    _oracles[key] = DistanceOracle(layout)
+  return _oracles[key]
+
+def getLandmarkIndex(layout, numLandmarks=None):
+  "Returns the LandmarkIndex of a layout, building it on first use."
+  if numLandmarks == None: numLandmarks = NUM_LANDMARKS
+  key = (layout.getLayoutHash(), numLandmarks)
+  if key not in _landmarkIndexes:
+    _landmarkIndexes[key] = LandmarkIndex(layout, numLandmarks)
+  return _landmarkIndexes[key]
+
+def _cellGraph(layout):
+  """
+  Numbers the open cells of a layout in (x,y) order.  Returns the cells, a
+  dict from cell to number and, for every cell, the numbers of the cells one
+  move away.
+  """
+  cells = [(x, y) for x in range(layout.width) for y in range(layout.height)
+           if not layout.walls[x][y]]
+  cellIndex = dict([(cell, i) for i, cell in enumerate(cells)])
+  successors = [[cellIndex[next] for action, next in layout.moves[cell]] for cell in cells]
+  return cells, cellIndex, successors
+
+def _bfs(successors, source):
+  "Returns an array of the distances from cell source to every cell."
+  row = array.array('H', [UNREACHABLE]) * len(successors)
+  row[source] = 0
+  frontier = [source]
+  for cell in frontier: # frontier grows as we go, so this is a queue
+    distance = row[cell] + 1
+    for next in successors[cell]:
+      if row[next] == UNREACHABLE:
+        row[next] = distance
+        frontier.append(next)
+  return row
+
+class DistanceOracle:
+  """
+  Maze distances between all pairs of open cells of a layout.  Cells are
+  numbered in (x,y) order; the distance from cell i to cell j is
+  distances[i * numCells + j].
+  """
+  def __init__(self, layout):
+    self.cells, self.cellIndex, successors = _cellGraph(layout)
+    self.numCells = len(self.cells)
+
+    cacheName = None
+    if getattr(layout, 'cacheDir', None) != None:
+      cacheName = os.path.join(layout.cacheDir, '%s.distances%d' % (layout.getLayoutHash().encode('hex'), DISTANCES_VERSION))
+    self.distances = self._load(cacheName)
+    if self.distances == None:
+      self.distances = array.array('H')
+      for source in range(self.numCells):
+        self.distances.extend(_bfs(successors, source))
+      self._save(cacheName)
+
+  def _load(self, cacheName):
+    if cacheName == None: return None
+    try:
+      f = open(cacheName, 'rb')
+      try: numCells, data = marshal.load(f)
+      finally: f.close()
+    except (IOError, EOFError, ValueError, TypeError):
+      return None
+    if numCells != self.numCells: return None
+    return array.array('H', data)
+
+  def _save(self, cacheName):
+    if cacheName == None: return
+    try:
+      tempName = '%s.%d' % (cacheName, os.getpid())
+      f = open(tempName, 'wb')
+      try: marshal.dump((self.numCells, self.distances.tostring()), f)
+      finally: f.close()
+      os.rename(tempName, cacheName)
+    except (IOError, OSError):
+      pass # The cache is only an optimization
+
+  def distance(self, a, b):
+    """
+    Returns the maze distance between open cells a and b, or None if neither
+    can be reached from the other.
+    """
+    d = self.distances[self.cellIndex[a] * self.numCells + self.cellIndex[b]]
+    if d == UNREACHABLE: return None
+    return d
+
+  def nearest(self, a, targets):
+    """
+    Returns (distance, target) for the target closest to a in the maze, or
+    (None, None) if no target can be reached.
+    """
+    start = self.cellIndex[a] * self.numCells
+    distances, cellIndex = self.distances, self.cellIndex
+    best, bestTarget = UNREACHABLE, None
+    for target in targets:
+      d = distances[start + cellIndex[target]]
+      if d < best: best, bestTarget = d, target
+    if bestTarget == None: return None, None
+    return best, bestTarget
+
+class LandmarkIndex:
+  """
+  Maze distances from a few landmark cells to every open cell.  By the
+  triangle inequality, |d(L, a) - d(L, b)| <= d(a, b) for every landmark L,
+  so lowerBound(a, b) is an admissible and consistent estimate of the maze
+  distance (the ALT heuristic).
+
+  Landmarks are chosen farthest first: each is the cell farthest from all
+  the landmarks before it, which spreads them around the edges of the maze.
+  """
+  def __init__(self, layout, numLandmarks=8):
+    self.cells, self.cellIndex, successors = _cellGraph(layout)
+    self.landmarks = []
+    self.distances = [] # One array per landmark
+    if not self.cells: return
+    closest = _bfs(successors, 0) # Distance to the nearest landmark so far
+    for i in range(min(numLandmarks, len(self.cells))):
+      landmark = max(range(len(self.cells)), key=closest.__getitem__)
+      row = _bfs(successors, landmark)
+      self.landmarks.append(self.cells[landmark])
+      self.distances.append(row)
+      if i == 0: closest = row
+      else: closest = array.array('H', map(min, closest, row))
+
+  def lowerBound(self, a, b):
+    "Returns a lower bound on the maze distance between open cells a and b."
+    i, j = self.cellIndex[a], self.cellIndex[b]
+    bound = 0
+    for row in self.distances:
+      da, db = row[i], row[j]
+      if da == UNREACHABLE or db == UNREACHABLE: continue
+      if da - db > bound: bound = da - db
+      elif db - da > bound: bound = db - da
+    return bound
@@ -0,0 +1,198 @@
+# gameRecorder.py
+# ---------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+A compact binary format for recording many games in one file.
+
+A recording is a header line followed by records, each a one-byte tag and
+a four-byte length followed by that many bytes:
+
+  L   a layout: the SHA-1 digest of its text, then the text itself.  Each
+      layout is written once per file, before the first game played on it.
+  G   a game: the digest of its layout, the number of agents and moves and
+      the checkpoint interval, then one byte per move (agentIndex * 5 plus
+      the action's code), then the marshalled checkpoints.
+
+A checkpoint is the full state after every checkpointInterval moves, so a
+game can be shown from move N by restoring the nearest checkpoint and
+replaying at most checkpointInterval - 1 moves.  Files are opened for
+appending, so games from many runs can be collected in one file.
+"""
+
+from game import Directions, Configuration
+import struct, marshal, os
+
+MAGIC = 'PACREC1\n'
+
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+ACTION_CODES = dict([(action, code) for code, action in enumerate(ACTIONS)])
+
+_RECORD_HEADER = struct.Struct('<cI')
+_GAME_HEADER = struct.Struct('<20sBIH')
+
+def isRecording(filename):
+  "Returns whether filename holds games written by a GameRecorder."
+  f = open(filename, 'rb')
+  try: return f.read(len(MAGIC)) == MAGIC
+  finally: f.close()
+
+class GameRecorder:
+  """
+  Appends finished games to a recording file.
+  """
+  def __init__(self, filename, checkpointInterval=100):
+    self.checkpointInterval = checkpointInterval
+    self.layoutHashes = set()
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+      for tag, payload in _readRecords(filename, 'L'):
+        self.layoutHashes.add(payload[:20])
+      self.file = open(filename, 'ab')
+    else:
+      self.file = open(filename, 'wb')
+      self.file.write(MAGIC)
+
+  def recordGame(self, layout, numAgents, moveHistory):
+    """
+    Writes a game played by numAgents agents on layout, with the given
+    (agentIndex, action) moves.
+    """
+    layoutHash = layout.getLayoutHash()
+    if layoutHash not in self.layoutHashes:
+      self._writeRecord('L', layoutHash + '\n'.join(layout.layoutText))
+      self.layoutHashes.add(layoutHash)
+
+    checkpoints = []
+    state = initialState(layout, numAgents)
+    for i, move in enumerate(moveHistory):
+      try:
+        state = state.generateSuccessor(*move)
+      except Exception:
+        moveHistory = moveHistory[:i] # An illegal move that crashed the game
+        break
+      if (i + 1) % self.checkpointInterval == 0:
+        checkpoints.append((i + 1, packState(state)))
+    moves = ''.join([chr(agentIndex * 5 + ACTION_CODES[action]) for agentIndex, action in moveHistory])
+    header = _GAME_HEADER.pack(layoutHash, numAgents, len(moveHistory), self.checkpointInterval)
+    self._writeRecord('G', header + moves + marshal.dumps(checkpoints))
+
+  def _writeRecord(self, tag, payload):
+    self.file.write(_RECORD_HEADER.pack(tag, len(payload)))
+    self.file.write(payload)
+
+  def close(self):
+    self.file.close()
+
+class RecordedGame:
+  """
+  A game read back from a recording.  actions is its list of
+  (agentIndex, action) moves, as in Game.moveHistory.
+  """
+  def __init__(self, layout, numAgents, actions, checkpoints):
+    self.layout = layout
+    self.numAgents = numAgents
+    self.actions = actions
+    self.checkpoints = checkpoints
+
+  def getState(self, moveNumber):
+    """
+    Returns the state after the first moveNumber moves, starting from the
+    latest checkpoint at or before that move.
+    """
+    moveNumber = max(0, min(moveNumber, len(self.actions)))
+    start, state = 0, None
+    for checkpointMove, packed in self.checkpoints:
+      if checkpointMove > moveNumber: break
+      start, state = checkpointMove, packed
+    if state == None:
+      state = initialState(self.layout, self.numAgents)
+    else:
+      state = unpackState(initialState(self.layout, self.numAgents), state)
+    for action in self.actions[start:moveNumber]:
+      state = state.generateSuccessor(*action)
+    return state
+
+def readGames(filename):
+  """
+  Yields the games in a recording, in the order they were written, as
+  RecordedGames.
+  """
+  import layout
+  layouts = {}
+  for tag, payload in _readRecords(filename):
+    if tag == 'L':
+      layouts[payload[:20]] = layout.Layout(payload[20:].split('\n'))
+    elif tag == 'G':
+      layoutHash, numAgents, numMoves, interval = _GAME_HEADER.unpack_from(payload)
+      start = _GAME_HEADER.size
+      actions = [divmod(ord(code), 5) for code in payload[start:start + numMoves]]
+      actions = [(agentIndex, ACTIONS[code]) for agentIndex, code in actions]
+      checkpoints = marshal.loads(payload[start + numMoves:])
+      yield RecordedGame(layouts[layoutHash], numAgents, actions, checkpoints)
+
+def readGame(filename, gameNumber):
+  "Returns game gameNumber (counting from 1) of a recording."
+  numGames = 0
+  for game in readGames(filename):
+    numGames += 1
+    if numGames == gameNumber: return game
+  raise Exception('%s holds only %d games' % (filename, numGames))
+
+def _readRecords(filename, tags='LG'):
+  """
+  Yields (tag, payload) for the records in a recording whose tag is one of
+  tags, seeking past the others without reading them.
+  """
+  f = open(filename, 'rb')
+  try:
+    if f.read(len(MAGIC)) != MAGIC:
+      raise Exception('%s is not a game recording' % filename)
+    while True:
+      header = f.read(_RECORD_HEADER.size)
+      if len(header) < _RECORD_HEADER.size: break
+      tag, length = _RECORD_HEADER.unpack(header)
+      if tag in tags:
+        yield tag, f.read(length)
+      else:
+        f.seek(length, 1)
+  finally:
+    f.close()
+
+def initialState(layout, numAgents):
+  "Returns the state every game played by numAgents agents on layout starts in."
+  import pacman
+  state = pacman.GameState()
+  state.initialize(layout, numAgents - 1)
+  return state
+
+def packState(state):
+  """
+  Returns the parts of a state that change during a game as nested tuples
+  of numbers and strings, which marshal can store.
+  """
+  data = state.data
+  agents = tuple([(agent.configuration.pos, agent.configuration.direction, agent.scaredTimer)
+                  for agent in data.agentStates])
+  return (agents, data.food.bits, tuple(data.capsules), data.score,
+          tuple(data._eaten), data._win, data._lose)
+
+def unpackState(state, packed):
+  "Replaces the parts of a fresh state that packState saved, and returns it."
+  agents, foodBits, capsules, score, eaten, win, lose = packed
+  data = state.data
+  for agentIndex, (pos, direction, scaredTimer) in enumerate(agents):
+    agent = data.getMutableAgentState(agentIndex)
+    agent.configuration = Configuration(pos, direction)
+    agent.scaredTimer = scaredTimer
+  data.food.setBits(foodBits)
+  data.capsules = list(capsules)
+  data.score = score
+  data._eaten = list(eaten)
+  data._win = win
+  data._lose = lose
+  data._zobrist = data.computeZobrist()
+  return state
@@ -9,6 +9,7 @@
 from util import manhattanDistance
 from game import Directions
 import random, util , sys
+import distanceCalculator
 
 from game import Agent
 
@@ -331,6 +332,8 @@ def betterEvaluationFunction(currentGameState):
   capsulePos=currentGameState.getCapsules()
 
   heuristic = 0
+  # Food and capsule distances are true maze distances
+  distances = distanceCalculator.getDistanceOracle(currentGameState.data.layout)
 
   weightFood, weightGhost, weightCapsule, weightHunter = 5.0, 5.0, 5.0, 0.0
 
@@ -338,7 +341,7 @@ def betterEvaluationFunction(currentGameState):
 
   #obtain food score
   currentFoodList = currentFood.asList()
-  closestFood = min([util.manhattanDistance(currentPos, foodPos) for foodPos in currentFoodList])
+  closestFood = distances.nearest(currentPos, currentFoodList)[0]
   foodScore = 1.0 / closestFood
 
   #consider ghost, capsule, food
@@ -357,7 +360,7 @@ def betterEvaluationFunction(currentGameState):
         
         if ghostCenterDist <= closestGhost and closestGhost >= 1 and closestGhost <= 5:
             if len(capsulePos) != 0:
-                closestCapsule = min([util.manhattanDistance(capsule,currentPos) for capsule in capsulePos]) #find the closetCapsule
+                closestCapsule = distances.nearest(currentPos, capsulePos)[0] #find the closetCapsule
                 if closestCapsule <= 3: #let the weightCapsule became high
                         weightCapsule, capsuleScore = 20.0, (1.0 / closestCapsule)
                         weightGhost, ghostScore = 3.0, (-1.0 / (ghostCenterDist+1))
@@ -368,7 +371,7 @@ def betterEvaluationFunction(currentGameState):
         elif ghostCenterDist >= closestGhost and closestGhost >= 1 :
             weightFood *= 3 #because we are not in trouble so eat food
             if len(capsulePos) != 0:
-                closestCapsule = min([util.manhattanDistance(capsule,currentPos) for capsule in capsulePos])
+                closestCapsule = distances.nearest(currentPos, capsulePos)[0]
                 if closestCapsule <= 3:
                         weightCapsule, capsuleScore = 10.0, (1.0 / closestCapsule)
                         weightGhost, ghostScore = 3.0, (-1.0 / closestGhost)
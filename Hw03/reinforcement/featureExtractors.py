@@ -10,6 +10,7 @@
 
 from game import Directions, Actions
 import util
+import distanceCalculator
 
 class FeatureExtractor:  
   def getFeatures(self, state, action):    
@@ -26,28 +27,6 @@ class IdentityExtractor(FeatureExtractor):
     feats[(state,action)] = 1.0
     return feats
 
-def closestFood(pos, food, walls):
-  """
-  closestFood -- this is similar to the function that we have
-  worked on in the search project; here its all in one place
-  """
-  fringe = [(pos[0], pos[1], 0)]
-  expanded = set()
-  while fringe:
-    pos_x, pos_y, dist = fringe.pop(0)
-    if (pos_x, pos_y) in expanded:
-      continue
-    expanded.add((pos_x, pos_y))
-    # if we find a food at this location then exit
-    if food[pos_x][pos_y]:
-      return dist
-    # otherwise spread out from the location to its neighbours
-    nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
-    for nbr_x, nbr_y in nbrs:
-      fringe.append((nbr_x, nbr_y, dist+1))
-  # no food found
-  return None
-
 class SimpleExtractor(FeatureExtractor):
   """
   Returns simple features for a basic reflex Pacman:
@@ -79,7 +58,8 @@ class SimpleExtractor(FeatureExtractor):
     if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
       features["eats-food"] = 1.0
     
-    dist = closestFood((next_x, next_y), food, walls)
+    distances = distanceCalculator.getDistanceOracle(state.data.layout)
+    dist = distances.nearest((next_x, next_y), food.asList())[0]
     if dist is not None:
       # make the distance a number less than one otherwise the update
       # will diverge wildly
@@ -37,6 +37,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import zobristKey
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
@@ -83,7 +84,7 @@ class GameState:
     # Check that successors exist
     if self.isWin() or self.isLose(): raise Exception('Can\'t generate a successor of a terminal state.')
 
-    # Copy current state
+    # Share the current state; the rules copy only the parts they change
     state = GameState(self)
 
     # Let agent's logic deal with its action's effects on the board
@@ -97,7 +98,9 @@ class GameState:
     if agentIndex == 0:
       state.data.scoreChange += -TIME_PENALTY # Penalty for waiting around
     else:
-      GhostRules.decrementTimer( state.data.agentStates[agentIndex] )
+      oldKey = state.data.agentZobrist( agentIndex )
+      GhostRules.decrementTimer( state.data.getMutableAgentState( agentIndex ) )
+      state.data.rehashAgent( agentIndex, oldKey )
 
     # Resolve multi-agent effects
     GhostRules.checkDeath( state, agentIndex )
@@ -168,6 +171,9 @@ class GameState:
 
     currentFood = state.getFood()
     if currentFood[x][y] == True: ...
+
+    currentFood.asList() gives the food positions in time proportional to
+    the amount of food left, not to the size of the board.
     """
     return self.data.food
 
@@ -214,6 +220,16 @@ class GameState:
     state.data = self.data.deepCopy()
     return state
 
+  def snapshot( self ):
+    """
+    Returns a copy of the state that an agent may keep or change without
+    affecting the game.  It shares the (read-only) layout, so it is much
+    cheaper than deepCopy; the game hands these to agents every turn.
+    """
+    state = GameState( self )
+    state.data = self.data.snapshot()
+    return state
+
   def __eq__( self, other ):
     """
     Allows two states to be compared.
@@ -226,6 +242,13 @@ class GameState:
     """
     return hash( self.data )
 
+  def getZobristKey( self ):
+    """
+    Returns a 64-bit key identifying this state.  It is maintained
+    incrementally as successors are generated, so it costs O(1) to read.
+    """
+    return self.data.getZobristKey()
+
   def __str__( self ):
 
     return str(self.data)
@@ -251,8 +274,9 @@ class ClassicGameRules:
   These game rules manage the control flow of a game, deciding when
   and how the game starts and ends.
   """
-  def __init__(self, timeout=30):
+  def __init__(self, timeout=30, moveTimeout=None):
     self.timeout = timeout
+    self.moveTimeout = moveTimeout
 
   def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False):
     agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
@@ -295,9 +319,10 @@ class ClassicGameRules:
     return self.timeout
 
   def getMoveWarningTime(self, agentIndex):
-    return self.timeout
+    return self.getMoveTimeout(agentIndex)
 
   def getMoveTimeout(self, agentIndex):
+    if self.moveTimeout != None: return self.moveTimeout
     return self.timeout
 
   def getMaxTimeWarnings(self, agentIndex):
@@ -314,7 +339,11 @@ class PacmanRules:
     """
     Returns a list of possible actions.
     """
-    return Actions.getPossibleActions( state.getPacmanState().configuration, state.data.layout.walls )
+    conf = state.data.agentStates[0].configuration
+    possibleActions = state.data.layout.pacmanActions.get( conf.pos )
+    if possibleActions == None: # Between grid points
+      return Actions.getPossibleActions( conf, state.data.layout.walls )
+    return list( possibleActions )
   getLegalActions = staticmethod( getLegalActions )
 
   def applyAction( state, action ):
@@ -325,11 +354,13 @@ class PacmanRules:
     if action not in legal:
       raise Exception("Illegal action " + str(action))
 
-    pacmanState = state.data.agentStates[0]
+    pacmanState = state.data.getMutableAgentState( 0 )
+    oldKey = state.data.agentZobrist( 0 )
 
     # Update Configuration
     vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
     pacmanState.configuration = pacmanState.configuration.generateSuccessor( vector )
+    state.data.rehashAgent( 0, oldKey )
 
     # Eat
     next = pacmanState.configuration.getPosition()
@@ -346,19 +377,22 @@ class PacmanRules:
       state.data.scoreChange += 10
       state.data.food = state.data.food.copy()
       state.data.food[x][y] = False
+      state.data._zobrist ^= zobristKey( ('food', position) )
       state.data._foodEaten = position
-      # TODO: cache numFood?
-      numFood = state.getNumFood()
-      if numFood == 0 and not state.data._lose:
+      if state.data.food.count() == 0 and not state.data._lose:
         state.data.scoreChange += 500
         state.data._win = True
     # Eat capsule
     if( position in state.getCapsules() ):
+      state.data.capsules = state.data.capsules[:]
       state.data.capsules.remove( position )
+      state.data._zobrist ^= zobristKey( ('capsule', position) )
       state.data._capsuleEaten = position
       # Reset all ghosts' scared timers
       for index in range( 1, len( state.data.agentStates ) ):
-        state.data.agentStates[index].scaredTimer = SCARED_TIME
+        oldKey = state.data.agentZobrist( index )
+        state.data.getMutableAgentState( index ).scaredTimer = SCARED_TIME
+        state.data.rehashAgent( index, oldKey )
   consume = staticmethod( consume )
 
 class GhostRules:
@@ -372,6 +406,10 @@ class GhostRules:
     reach a dead end, but can turn 90 degrees at intersections.
     """
     conf = state.getGhostState( ghostIndex ).configuration
+    legalActions = state.data.layout.ghostActions.get( (conf.pos, conf.direction) )
+    if legalActions != None:
+      return list( legalActions )
+    # Between grid points (a scared ghost moves at half speed)
     possibleActions = Actions.getPossibleActions( conf, state.data.layout.walls )
     reverse = Actions.reverseDirection( conf.direction )
     if Directions.STOP in possibleActions:
@@ -387,11 +425,13 @@ class GhostRules:
     if action not in legal:
       raise Exception("Illegal ghost action " + str(action))
 
-    ghostState = state.data.agentStates[ghostIndex]
+    ghostState = state.data.getMutableAgentState( ghostIndex )
+    oldKey = state.data.agentZobrist( ghostIndex )
     speed = GhostRules.GHOST_SPEED
     if ghostState.scaredTimer > 0: speed /= 2.0
     vector = Actions.directionToVector( action, speed )
     ghostState.configuration = ghostState.configuration.generateSuccessor( vector )
+    state.data.rehashAgent( ghostIndex, oldKey )
   applyAction = staticmethod( applyAction )
 
   def decrementTimer( ghostState):
@@ -419,9 +459,13 @@ class GhostRules:
   def collide( state, ghostState, agentIndex):
     if ghostState.scaredTimer > 0:
       state.data.scoreChange += 200
+      oldKey = state.data.agentZobrist( agentIndex )
+      ghostState = state.data.getMutableAgentState( agentIndex )
       GhostRules.placeGhost(state, ghostState)
       ghostState.scaredTimer = 0
+      state.data.rehashAgent( agentIndex, oldKey )
       # Added for first-person
+      state.data._eaten = state.data._eaten[:]
       state.data._eaten[agentIndex] = True
     else:
       if not state.data._win:
@@ -491,11 +535,17 @@ def readCommand( argv ):
   parser.add_option('-z', '--zoom', type='float', dest='zoom',
                     help=default('Zoom the size of the graphics window'), default=1.0)
   parser.add_option('-f', '--fixRandomSeed', action='store_true', dest='fixRandomSeed',
-                    help='Fixes the random seed to always play the same game', default=False)
+                    help='Fixes the random seed to always play the same games: each game is seeded from a fixed base seed and its number, as with --seed', default=False)
   parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                     help='Writes game histories to a file (named by the time they were played)', default=False)
+  parser.add_option('--recordFile', dest='recordFile',
+                    help='Append every game to this binary recording (see gameRecorder.py)', default=None)
   parser.add_option('--replay', dest='gameToReplay',
-                    help='A recorded game file (pickle) to replay', default=None)
+                    help='A recorded game file (pickle or --recordFile recording) to replay', default=None)
+  parser.add_option('--replayGame', dest='replayGame', type='int',
+                    help=default('Which game of a --recordFile recording to replay'), default=1)
+  parser.add_option('--replayFrom', dest='replayFrom', type='int',
+                    help=default('Start replaying a --recordFile recording after this many moves'), default=0)
   parser.add_option('-a','--agentArgs',dest='agentArgs',
                     help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
   parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -504,8 +554,22 @@ def readCommand( argv ):
                     help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
   parser.add_option('-c', '--catchExceptions', action='store_true', dest='catchExceptions', 
                     help='Turns on exception handling and timeouts during games', default=False)
-  parser.add_option('--timeout', dest='timeout', type='int',
+  parser.add_option('--timeout', dest='timeout', type='float',
                     help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+  parser.add_option('--moveTimeout', dest='moveTimeout', type='float',
+                    help='With -c, maximum number of seconds (e.g. 0.1) an agent can spend on a single move; defaults to --timeout', default=None)
+  parser.add_option('--workers', dest='workers', type='int',
+                    help=default('Play the non-training games in this many worker processes (no graphics); 0 plays them here. '
+                                 'With -f or --seed the games are the same as when played here, but each starts from the trained '
+                                 'agent, so agents that count episodes across games (the reinforcement learners) skip their status reports'), default=0)
+  parser.add_option('--seed', dest='seed', type='int',
+                    help='Seed every game from this base seed and the game number, so runs are reproducible with any --workers (-f does the same with a fixed base seed)', default=None)
+  parser.add_option('--streamStats', action='store_true', dest='streamStats',
+                    help='Keep only running statistics instead of every finished game, so memory stays flat for any -n', default=False)
+  parser.add_option('--histogram', dest='histogram', type='int',
+                    help='With --streamStats, also print a histogram of scores using bins of this width', default=None)
+  parser.add_option('--resultsFile', dest='resultsFile',
+                    help='Write one row per game to this file (JSON lines if it ends in .jsonl, CSV otherwise)', default=None)
 
   options, otherjunk = parser.parse_args(argv)
   if len(otherjunk) != 0:
@@ -551,12 +615,32 @@ def readCommand( argv ):
     args['display'] = graphicsDisplay.PacmanGraphics(options.zoom, frameTime = options.frameTime)
   args['numGames'] = options.numGames
   args['record'] = options.record
+  args['recordFile'] = options.recordFile
   args['catchExceptions'] = options.catchExceptions
   args['timeout'] = options.timeout
+  args['moveTimeout'] = options.moveTimeout
+  args['workers'] = options.workers
+  args['streamStats'] = options.streamStats
+  args['histogram'] = options.histogram
+  args['resultsFile'] = options.resultsFile
+
+  # Per-game seeds, so -f and --seed play the same games with any --workers
+  if options.seed != None:
+    args['seed'] = options.seed
+  elif options.fixRandomSeed:
+    args['seed'] = 'cs188'
+  elif options.workers > 0:
+    args['seed'] = random.randint(0, sys.maxint)
 
   # Special case: recorded games don't use the runGames method or args structure
   if options.gameToReplay != None:
     print 'Replaying recorded game %s.' % options.gameToReplay
+    import gameRecorder
+    if gameRecorder.isRecording(options.gameToReplay):
+      recorded = gameRecorder.readGame(options.gameToReplay, options.replayGame)
+      replayGame(recorded.layout, recorded.actions[options.replayFrom:], args['display'],
+                 recorded.getState(options.replayFrom))
+      sys.exit(0)
     import cPickle
     f = open(options.gameToReplay)
     try: recorded = cPickle.load(f)
@@ -590,12 +674,13 @@ def loadAgent(pacman, nographics):
         return getattr(module, pacman)
   raise Exception('The agent ' + pacman + ' is not specified in any *Agents.py.')
 
-def replayGame( layout, actions, display ):
+def replayGame( layout, actions, display, startState=None ):
     import pacmanAgents, ghostAgents
     rules = ClassicGameRules()
     agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1) for i in range(layout.getNumGhosts())]
     game = rules.newGame( layout, agents[0], agents[1:], display )
     state = game.state
+    if startState != None: state = startState
     display.initialize(state.data)
 
     for action in actions:
@@ -608,26 +693,200 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+class GameStatistics:
+  """
+  Running statistics over the results of many games, kept in constant
+  memory: the number of games and wins, the mean and variance of the score
+  (updated with Welford's method), the lowest and highest score and,
+  optionally, a histogram of scores in bins of histogramBinSize points.
+  """
+  def __init__( self, histogramBinSize=None ):
+    self.numGames = 0
+    self.numWins = 0
+    self.meanScore = 0.0
+    self._sumSquares = 0.0
+    self.minScore = None
+    self.maxScore = None
+    self.histogramBinSize = histogramBinSize
+    self.histogram = {}
+
+  def add( self, score, isWin ):
+    self.numGames += 1
+    if isWin: self.numWins += 1
+    delta = score - self.meanScore
+    self.meanScore += delta / float( self.numGames )
+    self._sumSquares += delta * ( score - self.meanScore )
+    if self.minScore == None or score < self.minScore: self.minScore = score
+    if self.maxScore == None or score > self.maxScore: self.maxScore = score
+    if self.histogramBinSize:
+      bin = int( score // self.histogramBinSize )
+      self.histogram[bin] = self.histogram.get( bin, 0 ) + 1
+
+  def getVariance( self ):
+    "The sample variance of the scores"
+    if self.numGames < 2: return 0.0
+    return self._sumSquares / ( self.numGames - 1 )
+
+  def getWinRate( self ):
+    if self.numGames == 0: return 0.0
+    return self.numWins / float( self.numGames )
+
+  def printSummary( self ):
+    print 'Average Score:', self.meanScore
+    print 'Score StdDev: ', self.getVariance() ** 0.5
+    print 'Score Range:   %s to %s' % ( self.minScore, self.maxScore )
+    print 'Win Rate:      %d/%d (%.2f)' % ( self.numWins, self.numGames, self.getWinRate() )
+    if self.histogramBinSize:
+      print 'Histogram:'
+      for bin in sorted( self.histogram ):
+        low = bin * self.histogramBinSize
+        print '  %6d to %6d: %d' % ( low, low + self.histogramBinSize - 1, self.histogram[bin] )
+
+class GameResultsWriter:
+  """
+  Writes one row per finished game to a file as the games finish: JSON
+  lines if the file name ends in .jsonl, CSV otherwise.
+  """
+  FIELDS = ['game', 'score', 'win', 'moves', 'crashed']
+
+  def __init__( self, filename ):
+    self.file = open( filename, 'w' )
+    self.isJson = filename.endswith( '.jsonl' )
+    if not self.isJson:
+      import csv
+      self.csvWriter = csv.writer( self.file )
+      self.csvWriter.writerow( self.FIELDS )
+
+  def write( self, gameNumber, game ):
+    row = [gameNumber, game.state.getScore(), game.state.isWin(), len( game.moveHistory ), game.agentCrashed]
+    if self.isJson:
+      import json, collections
+      self.file.write( json.dumps( collections.OrderedDict( zip( self.FIELDS, row ) ) ) + '\n' )
+    else:
+      self.csvWriter.writerow( row )
+    self.file.flush()
+
+  def close( self ):
+    self.file.close()
+
+def seedGame( seed, gameNumber ):
+  """
+  Seeds the random module for one game from the base seed and the game's
+  number, so the game plays out the same whichever process runs it.
+  """
+  if seed != None:
+    random.seed( '%s-%d' % (seed, gameNumber) )
+
+_workerArgs = None
+
+def _runGameInWorker( gameNumber ):
+  """
+  Plays one game in a worker process and returns what the parent needs to
+  report it: the game's printed output, its final state and move history.
+  """
+  import textDisplay, cStringIO, __main__
+  layout, pacman, ghosts, rules, catchExceptions, seed = _workerArgs
+  gameDisplay = textDisplay.NullGraphics()
+  __main__.__dict__['_display'] = gameDisplay
+  seedGame( seed, gameNumber )
+  output = cStringIO.StringIO()
+  oldStdout = sys.stdout
+  sys.stdout = output
+  try:
+    game = rules.newGame( layout, pacman, ghosts, gameDisplay, False, catchExceptions )
+    game.run()
+  finally:
+    sys.stdout = oldStdout
+  game.state.data.layout = None # The parent has the layout already
+  moveTimes = (game.agentMoveCounts, game.totalAgentMoveTimes, game.maxAgentMoveTimes)
+  return output.getvalue(), game.state, game.moveHistory, game.agentCrashed, game.agentTimeout, moveTimes
+
+def runGamesInWorkers( layout, pacman, ghosts, rules, gameNumbers, workers, catchExceptions, seed ):
+  """
+  Plays the given games in a pool of worker processes, yielding a finished
+  Game for each, in order, as soon as it and all games before it are done.
+
+  Every game is played in a freshly forked process, so each one starts from
+  the agents as they are now rather than as the games before it left them.
+  With the same seed the games play out as in serial mode, but agents that
+  count episodes across games see each test game as the first one:
+  ReinforcementAgent.final, for one, prints none of its status reports.
+  """
+  global _workerArgs
+  import multiprocessing
+  _workerArgs = (layout, pacman, ghosts, rules, catchExceptions, seed)
+  pool = multiprocessing.Pool( workers, maxtasksperchild=1 )
+  try:
+    for output, state, moveHistory, crashed, timedOut, moveTimes in pool.imap( _runGameInWorker, gameNumbers ):
+      sys.stdout.write( output )
+      state.data.layout = layout
+      game = Game( [pacman] + ghosts[:layout.getNumGhosts()], None, rules, catchExceptions=catchExceptions )
+      game.state = state
+      game.moveHistory = moveHistory
+      game.agentCrashed = crashed
+      game.agentTimeout = timedOut
+      game.agentMoveCounts, game.totalAgentMoveTimes, game.maxAgentMoveTimes = moveTimes
+      game.gameOver = True
+      yield game
+    pool.close()
+  finally:
+    pool.terminate()
+    _workerArgs = None
+
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, workers=0, seed=None,
+              moveTimeout=None, streamStats=False, histogram=None, resultsFile=None, recordFile=None ):
+  """
+  Plays numGames games and prints a summary of the non-training ones.
+
+  Returns the list of finished non-training games or, with streamStats, a
+  GameStatistics for them (no games are kept, so memory use does not grow
+  with numGames).  With resultsFile, a row per game is written as it ends.
+  """
   import __main__
   __main__.__dict__['_display'] = display
 
-  rules = ClassicGameRules(timeout)
+  rules = ClassicGameRules(timeout, moveTimeout)
   games = []
-
-  for i in range( numGames ):
-    beQuiet = i < numTraining
-    if beQuiet:
-        # Suppress output and graphics
-        import textDisplay
-        gameDisplay = textDisplay.NullGraphics()
-        rules.quiet = True
-    else:
-        gameDisplay = display
-        rules.quiet = False
-    game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
-    game.run()
-    if not beQuiet: games.append(game)
+  stats = GameStatistics( histogram )
+  writer = None
+  if resultsFile != None: writer = GameResultsWriter( resultsFile )
+  recorder = None
+  if recordFile != None:
+    import gameRecorder
+    recorder = gameRecorder.GameRecorder( recordFile )
+  moveTimes = {} # agentIndex -> [moves, total time, longest move]
+
+  def playGames():
+    # Training games always run here, so the agents learn from all of them
+    for i in range( numGames ):
+      if workers > 0 and i >= numTraining:
+        for game in runGamesInWorkers( layout, pacman, ghosts, rules, range( i, numGames ), workers, catchExceptions, seed ):
+          yield game
+        return
+      beQuiet = i < numTraining
+      if beQuiet:
+          # Suppress output and graphics
+          import textDisplay
+          gameDisplay = textDisplay.NullGraphics()
+          rules.quiet = True
+      else:
+          gameDisplay = display
+          rules.quiet = False
+      seedGame( seed, i )
+      game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
+      game.run()
+      yield game
+
+  for i, game in enumerate( playGames() ):
+    if i >= numTraining:
+      stats.add( game.state.getScore(), game.state.isWin() )
+      if writer != None: writer.write( i + 1, game )
+      if not streamStats: games.append(game)
+      for agentIndex, count in enumerate( game.agentMoveCounts ):
+        times = moveTimes.setdefault( agentIndex, [0, 0, 0] )
+        times[0] += count
+        times[1] += game.totalAgentMoveTimes[agentIndex]
+        times[2] = max( times[2], game.maxAgentMoveTimes[agentIndex] )
 
     if record:
       import time, cPickle
@@ -636,6 +895,21 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
       components = {'layout': layout, 'actions': game.moveHistory}
       cPickle.dump(components, f)
       f.close()
+    if recorder != None:
+      recorder.recordGame( layout, len( game.agents ), game.moveHistory )
+
+  if writer != None: writer.close()
+  if recorder != None: recorder.close()
+
+  if catchExceptions:
+    for agentIndex in sorted( moveTimes ):
+      count, total, longest = moveTimes[agentIndex]
+      if count > 0:
+        print 'Agent %d move time: %.1f ms mean, %.1f ms max over %d moves' % (agentIndex, 1000 * total / count, 1000 * longest, count)
+
+  if streamStats:
+    if numGames > 1: stats.printSummary()
+    return stats
 
   if numGames > 1:
     scores = [game.state.getScore() for game in games]
@@ -9,6 +9,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 
 
 """
@@ -35,11 +36,12 @@ class Stack:
 class Queue:
   "A container with a first-in-first-out (FIFO) queuing policy."
   def __init__(self):
-    self.list = []
+    # A deque, so that both ends take O(1) time
+    self.list = collections.deque()
   
   def push(self,item):
     "Enqueue the 'item' into the queue"
-    self.list.insert(0,item)
+    self.list.appendleft(item)
 
   def pop(self):
     """
@@ -93,7 +95,153 @@ class PriorityQueueWithFunction(PriorityQueue):
     "Adds an item to the queue with priority from the priority function"
     PriorityQueue.push(self, item, self.priorityFunction(item))
 
-    
+
+class IndexedPriorityQueue:
+  """
+    A priority queue that holds each item at most once, so that the
+    priority of an item already in the queue can be lowered (decrease-key).
+    Items are kept in a binary heap along with a dictionary from each item
+    to its place in the heap: push, pop and update take O(log n) time and
+    contains O(1).  As in PriorityQueue, items of equal priority come out
+    in the order of the items themselves.
+  """
+  def __init__(self):
+    self.heap = []
+    self.index = {}
+
+  def push(self, item, priority):
+    "Adds an item that is not in the queue yet"
+    self.index[item] = len(self.heap)
+    self.heap.append((priority, item))
+    self._siftUp(len(self.heap) - 1)
+
+  def pop(self):
+    "Removes and returns the item of lowest priority"
+    priority, item = self.heap[0]
+    del self.index[item]
+    last = self.heap.pop()
+    if self.heap:
+      self.heap[0] = last
+      self.index[last[1]] = 0
+      self._siftDown(0)
+    return item
+
+  def update(self, item, priority):
+    """
+      Lowers the priority of an item in the queue to priority, or pushes
+      the item if it is not in the queue.  An item already queued with a
+      priority no higher than the given one is left as it is.
+    """
+    i = self.index.get(item)
+    if i == None:
+      self.push(item, priority)
+    elif priority < self.heap[i][0]:
+      self.heap[i] = (priority, item)
+      self._siftUp(i)
+
+  def contains(self, item):
+    "Returns true if item is in the queue"
+    return item in self.index
+
+  def peekPriority(self):
+    "Returns the lowest priority of an item in the queue, without popping it"
+    return self.heap[0][0]
+
+  def isEmpty(self):
+    return len(self.heap) == 0
+
+  def __len__(self):
+    return len(self.heap)
+
+  def _siftUp(self, i):
+    heap, index = self.heap, self.index
+    entry = heap[i]
+    while i > 0:
+      parent = (i - 1) >> 1
+      if not entry < heap[parent]: break
+      heap[i] = heap[parent]
+      index[heap[i][1]] = i
+      i = parent
+    heap[i] = entry
+    index[entry[1]] = i
+
+  def _siftDown(self, i):
+    heap, index = self.heap, self.index
+    entry = heap[i]
+    size = len(heap)
+    while True:
+      child = 2 * i + 1
+      if child >= size: break
+      if child + 1 < size and heap[child + 1] < heap[child]: child += 1
+      if not heap[child] < entry: break
+      heap[i] = heap[child]
+      index[heap[i][1]] = i
+      i = child
+    heap[i] = entry
+    index[entry[1]] = i
+
+class BucketQueue:
+  """
+    A priority queue for small non-negative integer priorities, with the
+    same methods as IndexedPriorityQueue.  It keeps a list of items for
+    every priority and pops from the lowest list that is not empty, so
+    push, update and contains take O(1) time and pop only has to step past
+    empty lists (Dial's algorithm).  Items of equal priority come out last
+    in, first out.
+
+    Update leaves the old copy of an item in its list; pop skips any copy
+    whose priority is no longer the item's.
+  """
+  def __init__(self):
+    self.buckets = []
+    self.priorities = {} # The priority of every item in the queue
+    self.lowest = 0      # No bucket below this one holds a queued item
+
+  def push(self, item, priority):
+    "Adds an item that is not in the queue yet"
+    while len(self.buckets) <= priority:
+      self.buckets.append([])
+    self.buckets[priority].append(item)
+    self.priorities[item] = priority
+    if priority < self.lowest: self.lowest = priority
+
+  def pop(self):
+    "Removes and returns the most recently pushed item of lowest priority"
+    item = self.buckets[self.peekPriority()].pop()
+    del self.priorities[item]
+    return item
+
+  def peekPriority(self):
+    "Returns the lowest priority of an item in the queue, without popping it"
+    if not self.priorities: raise IndexError('peek into an empty BucketQueue')
+    priorities = self.priorities
+    while True:
+      bucket = self.buckets[self.lowest]
+      # Drop the old copies of updated items from the top of the bucket
+      while bucket and priorities.get(bucket[-1]) != self.lowest:
+        bucket.pop()
+      if bucket: return self.lowest
+      self.lowest += 1
+
+  def update(self, item, priority):
+    """
+      Lowers the priority of an item in the queue to priority, or pushes
+      the item if it is not in the queue.
+    """
+    current = self.priorities.get(item)
+    if current == None or priority < current:
+      self.push(item, priority)
+
+  def contains(self, item):
+    "Returns true if item is in the queue"
+    return item in self.priorities
+
+  def isEmpty(self):
+    return len(self.priorities) == 0
+
+  def __len__(self):
+    return len(self.priorities)
+
 def manhattanDistance( xy1, xy2 ):
   "Returns the Manhattan distance between points xy1 and xy2"
   return abs( xy1[0] - xy2[0] ) + abs( xy1[1] - xy2[1] )
@@ -467,7 +615,7 @@ def pause():
   
   
 ## code to handle timeouts
-import signal
+import signal, time
 class TimeoutFunctionException(Exception):
     """Exception to raise on a timeout"""
     pass
@@ -493,3 +641,56 @@ class TimeoutFunction:
             signal.signal(signal.SIGALRM, old)
         signal.alarm(0)
         return result
+
+class Watchdog:
+    """
+    Enforces time limits on function calls like TimeoutFunction, but is set
+    up once (say per game) instead of around every call, and its limits can
+    be fractions of a second.
+
+    start() installs a SIGALRM handler that stays in place until stop().  Each
+    call() arms the timer with a single setitimer call and never disarms it:
+    arming replaces any timer left over from an earlier call, and a leftover
+    timer that fires between calls is ignored.  Where setitimer is
+    unavailable, calls run without a limit, as with TimeoutFunction.
+    """
+    def __init__(self):
+        self.deadline = None
+        self.oldHandler = None
+        self.running = False
+
+    def start(self):
+        if self.running or not hasattr(signal, 'setitimer'): return
+        self.oldHandler = signal.signal(signal.SIGALRM, self.handleTimeout)
+        signal.siginterrupt(signal.SIGALRM, False)
+        self.running = True
+
+    def stop(self):
+        if not self.running: return
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self.oldHandler)
+        self.running = False
+
+    def handleTimeout(self, signum, frame):
+        if self.deadline == None: return
+        remaining = self.deadline - time.time()
+        if remaining > 0:
+            # A timer from an earlier call, or a slightly early one
+            signal.setitimer(signal.ITIMER_REAL, remaining)
+            return
+        self.deadline = None
+        raise TimeoutFunctionException()
+
+    def call(self, timeout, function, *args):
+        """
+        Returns function(*args), raising TimeoutFunctionException if it runs
+        for more than timeout seconds.
+        """
+        if not self.running: return function(*args)
+        if timeout <= 0: raise TimeoutFunctionException()
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        self.deadline = time.time() + timeout
+        try:
+            return function(*args)
+        finally:
+            self.deadline = None